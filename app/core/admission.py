@@ -0,0 +1,188 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Tuple
+import asyncio
+import time
+from app.core.metrics import REGISTRY
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "ai_service_admission_rejections_total", "Requests rejected by admission control", ("model", "reason")
+)
+ADMISSION_QUEUE_WAIT = REGISTRY.histogram(
+    "ai_service_admission_queue_wait_seconds", "Time spent waiting for a model slot", ("model",)
+)
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request rejected by admission control: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class RateLimiterBackend(ABC):
+    """Token bucket storage; implement against a shared store to limit across workers."""
+
+    @abstractmethod
+    async def consume(self, key: str, amount: float, rate: float, capacity: float) -> float:
+        """
+        Take ``amount`` tokens from the bucket; return 0 on success, else seconds until they are available.
+
+        An amount larger than ``capacity`` is taken once the bucket is full and leaves it
+        in debt, so later requests wait until it has been paid back at ``rate``.
+        """
+        pass
+
+class InMemoryRateLimiterBackend(RateLimiterBackend):
+    """Per-process token buckets, bounded to the most recently used keys."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def consume(self, key: str, amount: float, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        needed = min(amount, capacity)
+        if bucket[0] >= needed:
+            bucket[0] -= amount
+            return 0.0
+        return (needed - bucket[0]) / rate
+
+class _ModelGate:
+    """In-flight slots for one model; a request may take several, granted in arrival order."""
+
+    def __init__(self, max_in_flight: int):
+        self.capacity = max_in_flight
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self, slots: int) -> bool:
+        if self._waiters or self.in_flight + slots > self.capacity:
+            return False
+        self.in_flight += slots
+        return True
+
+    async def acquire(self, slots: int, timeout: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        waiter = (slots, future)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up; hand the slots back
+                self.release(slots)
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+                self._wake()
+            raise
+
+    def release(self, slots: int) -> None:
+        self.in_flight -= slots
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight + self._waiters[0][0] <= self.capacity:
+            slots, future = self._waiters.popleft()
+            self.in_flight += slots
+            future.set_result(None)
+
+class AdmissionController:
+    """
+    Per-user token buckets plus a per-model in-flight cap with a bounded wait queue.
+
+    Users are charged once per request with ``charge``; slots are taken with ``acquire``
+    on the model that actually serves it, which returns a release callback to invoke
+    once the generation (including any streamed response) has finished.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimiterBackend,
+        requests_per_minute: float,
+        request_burst: int,
+        tokens_per_minute: float = 0,
+        token_burst: int = 0,
+        max_in_flight_per_model: int = 16,
+        max_queue_per_model: int = 32,
+        queue_timeout: float = 10.0
+    ):
+        self.backend = backend
+        self.request_rate = requests_per_minute / 60.0
+        self.request_burst = request_burst
+        self.token_rate = tokens_per_minute / 60.0
+        self.token_burst = token_burst or tokens_per_minute
+        self.max_in_flight_per_model = max_in_flight_per_model
+        self.max_queue_per_model = max_queue_per_model
+        self.queue_timeout = queue_timeout
+        self._gates: Dict[str, _ModelGate] = {}
+
+    def _reject(self, model: str, reason: str, retry_after: float) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.inc(model=model, reason=reason)
+        return AdmissionRejected(reason, retry_after)
+
+    async def charge(self, uid: str, model: str, max_new_tokens: int = 0, items: int = 1) -> None:
+        """Charge ``items`` requests and ``max_new_tokens`` tokens to ``uid``; ``model`` only labels rejections."""
+        if self.request_rate > 0:
+            wait = await self.backend.consume(f"requests:{uid}", items, self.request_rate, self.request_burst)
+            if wait > 0:
+                raise self._reject(model, "user_rate_limit", wait)
+
+        if self.token_rate > 0 and max_new_tokens > 0:
+            wait = await self.backend.consume(f"tokens:{uid}", max_new_tokens, self.token_rate, self.token_burst)
+            if wait > 0:
+                raise self._reject(model, "user_token_budget", wait)
+
+    async def acquire(self, model: str, slots: int = 1, wait: bool = True) -> Callable[[], None]:
+        """
+        Take ``slots`` of the serving model's in-flight slots (a batch holds one per
+        concurrent upstream call). With ``wait=False`` a full model is rejected at once
+        instead of queueing, so the router can move on to a fallback.
+        """
+        gate = self._gates.get(model)
+        if gate is None:
+            gate = self._gates[model] = _ModelGate(self.max_in_flight_per_model)
+
+        slots = max(1, min(slots, gate.capacity))
+        if not gate.try_acquire(slots):
+            if not wait:
+                # Not counted as a rejection; the caller tries another model
+                raise AdmissionRejected("model_busy", 1.0)
+            if gate.waiting >= self.max_queue_per_model:
+                raise self._reject(model, "queue_full", 1.0)
+            started = time.perf_counter()
+            try:
+                await gate.acquire(slots, timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject(model, "queue_timeout", 1.0)
+            finally:
+                ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started, model=model)
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                gate.release(slots)
+
+        return release
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {"in_flight": gate.in_flight, "waiting": gate.waiting}
+            for model, gate in self._gates.items()
+        }
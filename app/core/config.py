@@ -1,10 +1,49 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, Optional
 import json
 
+DEFAULT_GENERATION_PARAMETERS = {
+    "max_new_tokens": 1024,
+    "temperature": 0.1,
+    "top_p": 0.1,
+    "do_sample": True,
+    "return_full_text": False,
+    "repetition_penalty": 1.2
+}
+
+DEFAULT_MODEL_REGISTRY = {
+    "mistral": {
+        "repo_id": "mistralai/Mistral-7B-Instruct-v0.2",
+        "context_window": 32768,
+        "parameters": DEFAULT_GENERATION_PARAMETERS,
+        "weight": 1.0,
+        "fallbacks": ["mixtral"]
+    },
+    "mixtral": {
+        "repo_id": "mistralai/Mixtral-8x7B-Instruct-v0.1",
+        "context_window": 32768,
+        "parameters": DEFAULT_GENERATION_PARAMETERS,
+        "weight": 1.0,
+        "fallbacks": ["mistral"]
+    }
+}
+
 class Settings(BaseSettings):
     # Hugging Face
     HUGGINGFACE_TOKEN: str
+    HUGGINGFACE_API_BASE_URL: str = "https://api-inference.huggingface.co/models"
+
+    # Model registry: JSON object keyed by model name, inline or in a file (the file wins).
+    # Each entry has "repo_id" (under HUGGINGFACE_API_BASE_URL) or a full "endpoint_url",
+    # plus optional "context_window", "parameters", "weight", "fallbacks" and a local
+    # "tokenizer_file" (tokenizer.json) for exact prompt token counts.
+    MODEL_REGISTRY: Dict[str, Dict[str, Any]] = DEFAULT_MODEL_REGISTRY
+    MODEL_REGISTRY_FILE: Optional[str] = None
+
+    # Routing for the "auto" model and fallbacks
+    ROUTING_EWMA_ALPHA: float = 0.2
+    ROUTING_ERROR_PENALTY: float = 5.0
+    ROUTING_EXPLORATION_RATE: float = 0.05
 
     # Firebase
     FIREBASE_PROJECT_ID: str
@@ -16,6 +55,90 @@ class Settings(BaseSettings):
     FIREBASE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
     FIREBASE_AUTH_PROVIDER_CERT_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
     FIREBASE_CLIENT_CERT_URL: Optional[str] = None
+    FIREBASE_ID_TOKEN_CERTS_URL: str = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+    # Auth caches
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL: float = 3600.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL: float = 300.0
+    AUTH_CERTS_REFRESH_MARGIN: float = 300.0
+
+    # Upstream HTTP client pool
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_HTTP2: bool = True
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 60.0
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 10.0
+
+    # Generation response cache ("memory", "sqlite" or "none")
+    GENERATION_CACHE_BACKEND: str = "memory"
+    GENERATION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    GENERATION_CACHE_TTL: float = 3600.0
+    GENERATION_CACHE_MAX_TEMPERATURE: float = 0.1
+    GENERATION_CACHE_SQLITE_PATH: str = "generation_cache.sqlite3"
+    GENERATION_CACHE_SQLITE_MAX_ENTRIES: int = 100000
+
+    # Batch generation
+    BATCH_MAX_ITEMS: int = 64
+    BATCH_MAX_CONCURRENCY: int = 4
+
+    # Micro-batching of concurrent single generations into list-input upstream calls;
+    # only for endpoints that accept a list of prompts (see "micro_batching" per model)
+    MICRO_BATCH_ENABLED: bool = False
+    MICRO_BATCH_MAX_SIZE: int = 8
+    MICRO_BATCH_MAX_WAIT: float = 0.005
+
+    # Prompt token budget: prompts that leave fewer than PROMPT_MIN_NEW_TOKENS of the
+    # model's context window are rejected with 413 ("reject") or cut to fit ("truncate")
+    PROMPT_OVERFLOW: str = "reject"
+    PROMPT_MIN_NEW_TOKENS: int = 16
+    TOKEN_COUNT_CACHE_SIZE: int = 10000
+
+    # Language detection
+    LANGUAGE_DETECTION_MAX_CHARS: int = 512
+    LANGUAGE_DETECTION_CACHE_SIZE: int = 10000
+    LANGUAGE_DETECTION_THREADS: int = 2
+
+    # Upstream resilience
+    UPSTREAM_MAX_ATTEMPTS: int = 3
+    UPSTREAM_BACKOFF_BASE: float = 0.5
+    UPSTREAM_BACKOFF_MAX: float = 10.0
+    UPSTREAM_DEADLINE: float = 90.0
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = 30.0
+    HEDGING_ENABLED: bool = False
+    HEDGING_PERCENTILE: float = 95.0
+    HEDGING_MIN_SAMPLES: int = 20
+
+    # Admission control
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REQUESTS_PER_MINUTE: float = 60.0
+    RATE_LIMIT_BURST: int = 10
+    TOKEN_BUDGET_PER_MINUTE: float = 0.0
+    TOKEN_BUDGET_BURST: int = 0
+    MODEL_MAX_IN_FLIGHT: int = 16
+    MODEL_MAX_QUEUE: int = 32
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0
+
+    # Serving ("development" runs a single reloading process, "production" a pre-forked worker pool)
+    SERVER_MODE: str = "development"
+    SERVER_HOST: str = "localhost"
+    SERVER_PORT: int = 8083
+    SERVER_WORKERS: int = 0  # 0 = one per CPU core
+    SERVER_GRACEFUL_TIMEOUT: int = 60
+    SERVER_DRAIN_DELAY: float = 5.0  # seconds /health/ready reports 503 before the socket closes
+    SERVER_KEEPALIVE_TIMEOUT: int = 5
+
+    # Logging ("json" or "text"); records are written by a background thread.
+    # Sample rates apply per level to records logged while serving a request.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {"DEBUG": 0.01, "INFO": 0.1}
 
     class Config:
         env_file = ".env"
@@ -27,7 +150,12 @@ class Settings(BaseSettings):
             "project_id": self.FIREBASE_PROJECT_ID,
             "private_key_id": self.FIREBASE_PRIVATE_KEY_ID,
             "private_key": self.FIREBASE_PRIVATE_KEY.replace("\\n", "\n"),
-            "client_email": self.FIREBASE_CLIENT_EMAIL
+            "client_email": self.FIREBASE_CLIENT_EMAIL,
+            "client_id": self.FIREBASE_CLIENT_ID,
+            "auth_uri": self.FIREBASE_AUTH_URI,
+            "token_uri": self.FIREBASE_TOKEN_URI,
+            "auth_provider_x509_cert_url": self.FIREBASE_AUTH_PROVIDER_CERT_URL,
+            "client_x509_cert_url": self.FIREBASE_CLIENT_CERT_URL
         }
 
     def validate(self) -> None:
@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+from app.core.config import Settings
+from app.core.cache import TTLCache
+from app.core.language_detector import load_detector, detect_language_async
+from app.core.resilience import RetryPolicy, CircuitBreaker
+from app.core.metrics import Sample, EventLoopLagMonitor, process_samples, stats_samples
+from app.core.admission import AdmissionController, InMemoryRateLimiterBackend
+from app.core.model_registry import ModelRegistry, AUTO_MODEL
+from app.core.token_budget import TokenBudget, load_token_counter
+from app.domain.usecases.verify_auth import VerifyTokenUseCase, GetUserUseCase
+from app.domain.usecases.generate_text import GenerateTextUseCase
+from app.infrastructure.external.firebase_service import FirebaseService
+from app.infrastructure.external.firebase_token_verifier import FirebaseTokenVerifier
+from app.infrastructure.external.huggingface_service import HuggingFaceService
+from app.infrastructure.external.http_client_pool import HttpClientPool
+from app.infrastructure.external.model_router import ModelRouter, RoutedModel
+from app.infrastructure.cache.generation_cache import (
+    GenerationCache, InMemoryGenerationCache, SQLiteGenerationCache
+)
+
+class ServiceContainer:
+    """
+    Process-wide services, built once per worker and shared by every request.
+
+    Construction wires the object graph synchronously; ``startup`` and ``shutdown``
+    manage the background tasks and network resources the services own.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.warmed_up = False
+        self.draining = False
+        self.http_client_pool = HttpClientPool(settings)
+
+        self.firebase_token_verifier = FirebaseTokenVerifier(
+            project_id=settings.FIREBASE_PROJECT_ID,
+            certs_url=settings.FIREBASE_ID_TOKEN_CERTS_URL,
+            cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+            cache_ttl=settings.AUTH_TOKEN_CACHE_TTL,
+            refresh_margin=settings.AUTH_CERTS_REFRESH_MARGIN
+        )
+        self.firebase_user_cache = TTLCache(
+            max_size=settings.AUTH_USER_CACHE_SIZE,
+            ttl=settings.AUTH_USER_CACHE_TTL
+        )
+        self.auth_service = FirebaseService(
+            firebase_credentials=settings.get_firebase_credentials(),
+            token_verifier=self.firebase_token_verifier,
+            user_cache=self.firebase_user_cache
+        )
+        self.verify_token_usecase = VerifyTokenUseCase(self.auth_service)
+        self.get_user_usecase = GetUserUseCase(self.auth_service)
+
+        if settings.RATE_LIMIT_BACKEND.lower() != "memory":
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
+        self.admission_controller = AdmissionController(
+            InMemoryRateLimiterBackend(),
+            requests_per_minute=settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+            request_burst=settings.RATE_LIMIT_BURST,
+            tokens_per_minute=settings.TOKEN_BUDGET_PER_MINUTE,
+            token_burst=settings.TOKEN_BUDGET_BURST,
+            max_in_flight_per_model=settings.MODEL_MAX_IN_FLIGHT,
+            max_queue_per_model=settings.MODEL_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT
+        )
+
+        self.event_loop_lag_monitor = EventLoopLagMonitor()
+        self.generation_cache = self._build_generation_cache(settings)
+        self.model_registry = ModelRegistry.from_settings(settings)
+        self.text_generation_services: Dict[str, HuggingFaceService] = {
+            model.name: HuggingFaceService(
+                self.http_client_pool,
+                model=model,
+                generation_cache=self.generation_cache,
+                retry_policy=RetryPolicy(
+                    max_attempts=settings.UPSTREAM_MAX_ATTEMPTS,
+                    base_delay=settings.UPSTREAM_BACKOFF_BASE,
+                    max_delay=settings.UPSTREAM_BACKOFF_MAX,
+                    deadline=settings.UPSTREAM_DEADLINE
+                ),
+                circuit_breaker=CircuitBreaker(
+                    model.name,
+                    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    recovery_timeout=settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT
+                ),
+                hedge_percentile=settings.HEDGING_PERCENTILE if settings.HEDGING_ENABLED else None,
+                hedge_min_samples=settings.HEDGING_MIN_SAMPLES,
+                micro_batch_size=settings.MICRO_BATCH_MAX_SIZE
+                if settings.MICRO_BATCH_ENABLED and model.micro_batching else 1,
+                micro_batch_wait=settings.MICRO_BATCH_MAX_WAIT,
+                token_budget=TokenBudget(
+                    model.name,
+                    load_token_counter(model.tokenizer_file, settings.TOKEN_COUNT_CACHE_SIZE),
+                    model.context_window,
+                    overflow=settings.PROMPT_OVERFLOW,
+                    min_new_tokens=settings.PROMPT_MIN_NEW_TOKENS
+                )
+            )
+            for model in self.model_registry
+        }
+        self.model_router = ModelRouter(
+            self.model_registry,
+            self.text_generation_services,
+            ewma_alpha=settings.ROUTING_EWMA_ALPHA,
+            error_penalty=settings.ROUTING_ERROR_PENALTY,
+            exploration_rate=settings.ROUTING_EXPLORATION_RATE,
+            admission=self.admission_controller
+        )
+        self.text_generation_usecases: Dict[str, GenerateTextUseCase] = {
+            model_name: GenerateTextUseCase(RoutedModel(self.model_router, model_name))
+            for model_name in self.model_registry.names() + [AUTO_MODEL]
+        }
+
+    @staticmethod
+    def _build_generation_cache(settings: Settings) -> Optional[GenerationCache]:
+        backend_name = settings.GENERATION_CACHE_BACKEND.lower()
+        if backend_name == "none":
+            return None
+        if backend_name == "memory":
+            backend = InMemoryGenerationCache(
+                max_bytes=settings.GENERATION_CACHE_MAX_BYTES,
+                ttl=settings.GENERATION_CACHE_TTL
+            )
+        elif backend_name == "sqlite":
+            backend = SQLiteGenerationCache(
+                path=settings.GENERATION_CACHE_SQLITE_PATH,
+                ttl=settings.GENERATION_CACHE_TTL,
+                max_entries=settings.GENERATION_CACHE_SQLITE_MAX_ENTRIES
+            )
+        else:
+            raise ValueError(f"Unknown GENERATION_CACHE_BACKEND: {settings.GENERATION_CACHE_BACKEND}")
+        return GenerationCache(backend, max_temperature=settings.GENERATION_CACHE_MAX_TEMPERATURE)
+
+    def text_generation_usecase(self, model_name: str) -> GenerateTextUseCase:
+        try:
+            return self.text_generation_usecases[model_name]
+        except KeyError:
+            raise ValueError(f"Model {model_name} not supported. Available models: {', '.join(self.text_generation_usecases)}")
+
+    def collect_metrics(self) -> List[Sample]:
+        """Expose the services' own stats as gauges at scrape time."""
+        samples = process_samples()
+        samples.append((
+            "ai_service_event_loop_max_lag_seconds", {"pid": str(os.getpid())},
+            self.event_loop_lag_monitor.max_lag
+        ))
+        samples += stats_samples("ai_service_auth_token_cache", self.firebase_token_verifier.stats())
+        samples += stats_samples("ai_service_auth_user_cache", self.firebase_user_cache.stats())
+        if self.generation_cache is not None:
+            samples += stats_samples("ai_service_generation_cache", self.generation_cache.stats())
+
+        pool_stats = self.http_client_pool.stats()
+        for model_name, client_stats in pool_stats["clients"].items():
+            samples += stats_samples("ai_service_http_pool", client_stats, {"model": model_name})
+        for model_name, gate_stats in self.admission_controller.stats().items():
+            samples += stats_samples("ai_service_admission", gate_stats, {"model": model_name})
+        for model_name, service in self.text_generation_services.items():
+            samples += stats_samples("ai_service_upstream", service.resilience_stats(), {"model": model_name})
+            samples.append((
+                "ai_service_circuit_breaker_open", {"model": model_name},
+                float(service.circuit_breaker.is_open())
+            ))
+        for model_name, health in self.model_router.stats().items():
+            samples += stats_samples("ai_service_routing", health, {"model": model_name})
+        return samples
+
+    async def startup(self) -> None:
+        await asyncio.to_thread(
+            load_detector,
+            max_chars=self.settings.LANGUAGE_DETECTION_MAX_CHARS,
+            cache_size=self.settings.LANGUAGE_DETECTION_CACHE_SIZE,
+            max_workers=self.settings.LANGUAGE_DETECTION_THREADS
+        )
+        await self.firebase_token_verifier.start()
+        self.event_loop_lag_monitor.start()
+        logging.info("Service container started")
+
+    async def warm_up(self) -> None:
+        """Pay first-request costs (detector threads, TLS contexts) before reporting ready."""
+        await detect_language_async("Warming up the language detector")
+        for model_name in self.text_generation_services:
+            self.http_client_pool.get_client(model_name)
+        self.warmed_up = True
+        logging.info("Service container warmed up")
+
+    def readiness(self) -> Dict[str, Any]:
+        checks = {
+            "warmed_up": self.warmed_up,
+            "accepting_requests": not self.draining,
+            "firebase_certificates": self.firebase_token_verifier.stats()["certificates"] > 0,
+            "open_circuits": [
+                name for name, service in self.text_generation_services.items()
+                if service.circuit_breaker.is_open()
+            ]
+        }
+        # Without certificates tokens are verified remotely and open circuits recover on
+        # their own, so those are reported but do not take the worker out of rotation
+        return {"ready": self.warmed_up and not self.draining, "checks": checks}
+
+    def begin_draining(self) -> None:
+        """Report not-ready so load balancers stop sending new requests to this worker."""
+        if not self.draining:
+            self.draining = True
+            logging.info("Service container draining")
+
+    async def shutdown(self) -> None:
+        self.begin_draining()
+        await self.event_loop_lag_monitor.stop()
+        await self.firebase_token_verifier.stop()
+        for service in self.text_generation_services.values():
+            if service.micro_batcher is not None:
+                await service.micro_batcher.aclose()
+        await self.http_client_pool.aclose()
+        if self.generation_cache is not None:
+            await self.generation_cache.backend.close()
+        logging.info("Service container shut down")
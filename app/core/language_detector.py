@@ -1,4 +1,13 @@
-from langdetect import detect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import langdetect
+from app.core.cache import TTLCache
 
 SYSTEM_PROMPTS = {
     "tr": "Türkçe olarak yanıt ver. Açık, anlaşılır ve profesyonel bir dil kullan.",
@@ -8,13 +17,163 @@ SYSTEM_PROMPTS = {
     "fr": "Répondez en français. Utilisez un langage clair, concis et professionnel."
 }
 
+DEFAULT_LANGUAGE = "en"
+
+# Below either threshold the text is too short or too ambiguous to tell apart, and
+# "hi" or "ok" would otherwise land on whichever profile happens to score highest.
+# Tuned on the short prompts in benchmarks/language_detection.py: no prompt there is
+# answered confidently with the wrong language.
+MIN_MATCHED_NGRAMS = 10
+MIN_LOG_PROB_MARGIN = 7.0
+
+# Anything that is not a letter separates words, mirroring langdetect's normalisation
+_NON_LETTERS = re.compile(r"[\W\d_]+")
+
+class NgramLanguageDetector:
+    """
+    Deterministic naive-Bayes language detector restricted to the languages we prompt in.
+
+    Uses langdetect's 1-3 gram frequency profiles, but scores every n-gram of a
+    bounded text prefix once instead of langdetect's randomised sampling trials.
+    Texts with too few known n-grams, or whose best two languages score too
+    close together, fall back to DEFAULT_LANGUAGE.
+    """
+
+    def __init__(
+        self,
+        profiles: Dict[str, dict],
+        max_chars: int = 512,
+        cache_size: int = 10000,
+        min_ngrams: int = MIN_MATCHED_NGRAMS,
+        min_margin: float = MIN_LOG_PROB_MARGIN
+    ):
+        self.languages: List[str] = list(profiles)
+        self.max_chars = max_chars
+        self.min_ngrams = min_ngrams
+        self.min_margin = min_margin
+        self.cache = TTLCache(max_size=cache_size, ttl=float("inf"))
+        self._log_probs: Dict[str, Tuple[float, ...]] = self._build_log_probs(profiles)
+
+    @classmethod
+    def from_langdetect_profiles(cls, languages: Iterable[str], **kwargs) -> "NgramLanguageDetector":
+        profiles_dir = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+        profiles = {}
+        for language in languages:
+            with open(os.path.join(profiles_dir, language), encoding="utf-8") as f:
+                profiles[language] = json.load(f)
+        return cls(profiles, **kwargs)
+
+    def _build_log_probs(self, profiles: Dict[str, dict]) -> Dict[str, Tuple[float, ...]]:
+        ngrams = set()
+        for profile in profiles.values():
+            ngrams.update(profile["freq"])
+
+        # The profiles are pruned, so an n-gram missing from one is rare in that language
+        # rather than impossible; count it as half the smallest count that was kept
+        unseen = {}
+        for language, profile in profiles.items():
+            smallest = [0] * 3
+            for ngram, count in profile["freq"].items():
+                n = len(ngram) - 1
+                smallest[n] = count if not smallest[n] else min(smallest[n], count)
+            unseen[language] = [max(count, 1) / 2 for count in smallest]
+
+        log_probs = {}
+        for ngram in ngrams:
+            scores = []
+            for language in self.languages:
+                profile = profiles[language]
+                total = profile["n_words"][len(ngram) - 1]
+                count = profile["freq"].get(ngram) or unseen[language][len(ngram) - 1]
+                scores.append(math.log(count / total))
+            log_probs[ngram] = tuple(scores)
+        return log_probs
+
+    @staticmethod
+    def _ngrams(text: str) -> Iterable[str]:
+        for word in _NON_LETTERS.split(text):
+            # langdetect ignores words written entirely in capitals
+            if not word or (len(word) > 1 and word.isupper()):
+                continue
+            padded = f" {word} "
+            for end in range(1, len(padded)):
+                for n in (1, 2, 3):
+                    if end + 1 - n < 0:
+                        break
+                    ngram = padded[end + 1 - n:end + 1]
+                    if ngram != " ":
+                        yield ngram
+
+    def classify(self, text: str) -> Optional[str]:
+        """The most likely language of ``text``, or None when it is too short or ambiguous to tell."""
+        totals = [0.0] * len(self.languages)
+        matched = 0
+        for ngram in self._ngrams(text):
+            scores = self._log_probs.get(ngram)
+            if scores is None:
+                continue
+            matched += 1
+            for i, score in enumerate(scores):
+                totals[i] += score
+
+        if matched < self.min_ngrams:
+            return None
+        ranked = sorted(range(len(totals)), key=totals.__getitem__, reverse=True)
+        if len(ranked) > 1 and totals[ranked[0]] - totals[ranked[1]] < self.min_margin:
+            return None
+        return self.languages[ranked[0]]
+
+    def _score(self, text: str) -> str:
+        return self.classify(text) or DEFAULT_LANGUAGE
+
+    def cached(self, text: str) -> Optional[str]:
+        return self.cache.get(text[:self.max_chars])
+
+    def detect_uncached(self, text: str) -> str:
+        prefix = text[:self.max_chars]
+        language = self._score(prefix)
+        self.cache.set(prefix, language)
+        return language
+
+    def detect(self, text: str) -> str:
+        return self.cached(text) or self.detect_uncached(text)
+
+_detector: Optional[NgramLanguageDetector] = None
+_detector_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+def load_detector(max_chars: int = 512, cache_size: int = 10000, max_workers: int = 2) -> NgramLanguageDetector:
+    """Load the n-gram profiles once; call at startup so requests never pay for it."""
+    global _detector, _executor
+    with _detector_lock:
+        if _detector is None:
+            _detector = NgramLanguageDetector.from_langdetect_profiles(
+                SYSTEM_PROMPTS, max_chars=max_chars, cache_size=cache_size
+            )
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="language-detector")
+    return _detector
+
+def get_detector() -> NgramLanguageDetector:
+    return _detector or load_detector()
+
 def detect_language(text: str) -> str:
     """Detect the language of the input text."""
     try:
-        lang = detect(text)
-        return lang if lang in SYSTEM_PROMPTS else "en"
-    except:
-        return "en"  # Default to English if detection fails
+        return get_detector().detect(text)
+    except Exception:
+        return DEFAULT_LANGUAGE  # Default to English if detection fails
+
+async def detect_language_async(text: str) -> str:
+    """Detect the language without blocking the event loop on cache misses."""
+    try:
+        detector = get_detector()
+        language = detector.cached(text)
+        if language is not None:
+            return language
+        return await asyncio.get_running_loop().run_in_executor(_executor, detector.detect_uncached, text)
+    except Exception:
+        return DEFAULT_LANGUAGE
 
 def format_prompt(user_input: str, detected_lang: str) -> str:
     """Format the prompt with the appropriate system message."""
@@ -0,0 +1,175 @@
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import zlib
+from app.core.config import Settings
+from app.core.metrics import REGISTRY
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "ai_service_log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+
+# Set per request by RequestContextMiddleware; None outside of a request
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REDACTED = "[REDACTED]"
+_REDACTION_PATTERNS = [
+    (re.compile(r"-----BEGIN [A-Z ]*PRIVATE KEY-----.*?-----END [A-Z ]*PRIVATE KEY-----", re.S), REDACTED),
+    (re.compile(r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*"), REDACTED),
+    (re.compile(r"(?i)\b(bearer\s+)[A-Za-z0-9._~+/-]+=*"), r"\1" + REDACTED),
+    (re.compile(r"\bhf_[A-Za-z0-9]{16,}"), REDACTED),
+    (
+        re.compile(
+            r"(?i)((?:id_token|token|api_key|secret|password|private_key(?:_id)?|authorization)[\"']?\s*[:=]\s*[\"']?)"
+            r"[^\s,\"'}]+"
+        ),
+        r"\1" + REDACTED
+    )
+]
+# Cheap pre-check so most messages skip the substitutions above
+_MAY_CONTAIN_SECRET = re.compile(r"(?i)eyJ|bearer|hf_|token|key|secret|password|authorization")
+_SENSITIVE_KEY = re.compile(r"(?i)(^|_)(token|secret|password|private_key|authorization|api_key|credentials?)$")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+def redact(text: str) -> str:
+    """Mask bearer tokens, JWTs, private keys and key=value secrets in ``text``."""
+    if not _MAY_CONTAIN_SECRET.search(text):
+        return text
+    for pattern, replacement in _REDACTION_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+def _redact_value(key: str, value: Any) -> Any:
+    if _SENSITIVE_KEY.search(key):
+        return REDACTED
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return redact(str(value))
+
+class RedactingFormatter(logging.Formatter):
+    """The plain text format, with the request ID and secrets masked."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return redact(super().format(record))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed with ``extra`` are included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = _redact_value(key, value)
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to a background writer thread without formatting them.
+
+    The request ID is captured here, on the logging thread, since the writer
+    cannot see the request's context. Records below WARNING logged during a
+    request are sampled per request, so a sampled request keeps all its lines.
+    When the queue is full the record is dropped and counted instead of
+    blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue, sample_rates: Dict[str, float]):
+        super().__init__(log_queue)
+        self.sample_rates = {level.upper(): rate for level, rate in sample_rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        if request_id is not None and record.levelno < logging.WARNING:
+            rate = self.sample_rates.get(record.levelname, 1.0)
+            if rate < 1.0 and zlib.crc32(request_id.encode()) / 0xFFFFFFFF >= rate:
+                return False
+        return bool(super().filter(record))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[AsyncQueueHandler] = None
+
+def _start_listener(queue_size: int) -> None:
+    global _listener
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+def _restart_after_fork() -> None:
+    # The writer thread does not survive fork (gunicorn preloads the app in the
+    # arbiter), and the old queue's lock may have been held when it forked
+    if _listener is not None:
+        _start_listener(_queue_handler.queue.maxsize)
+
+def _skip_unused_record_fields() -> None:
+    # Neither format prints the caller's file/line or thread, and collecting
+    # them (a stack walk per record) is most of the cost of creating a record
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+
+def configure_logging(settings: Settings) -> None:
+    """Route the root logger through a queue to a writer thread on stderr."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    _skip_unused_record_fields()
+
+    writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(JsonFormatter() if settings.LOG_FORMAT.lower() == "json" else RedactingFormatter())
+
+    _queue_handler = AsyncQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE), settings.LOG_SAMPLE_RATES)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(_queue_handler.queue, writer, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the writer thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
@@ -0,0 +1,257 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import asyncio
+import math
+import os
+import resource
+import time
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: non-cumulative bucket counts, sum of observations
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * len(self.buckets), [0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+Sample = Tuple[str, Dict[str, str], float]
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        """Add a callback that produces gauge samples at scrape time."""
+        self._collectors.append(collector)
+
+    def unregister_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        collected: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                names = sorted(labels)
+                collected.setdefault(name, []).append(
+                    f"{name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}"
+                )
+        for name, samples in collected.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_TOTAL = REGISTRY.counter(
+    "ai_service_http_requests_total", "HTTP requests by route, model and status code",
+    ("method", "route", "model", "status")
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "ai_service_http_request_duration_seconds", "HTTP request latency by route and model",
+    ("method", "route", "model")
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "ai_service_http_requests_in_flight", "HTTP requests currently being served"
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "ai_service_stage_duration_seconds", "Time spent in each request processing stage",
+    ("stage", "model")
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "ai_service_upstream_responses_total", "Inference upstream responses by status code",
+    ("model", "status")
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "ai_service_upstream_requests_in_flight", "Inference upstream requests currently open", ("model",)
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "ai_service_upstream_retries_total", "Inference upstream retries by error class", ("model", "kind")
+)
+
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    "ai_service_event_loop_lag_seconds", "How late the event loop ran a periodic timer",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+class EventLoopLagMonitor:
+    """Periodically measures how far a sleep overshoots, i.e. how long the loop was blocked."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - expected, 0.0)
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+def process_samples() -> List[Sample]:
+    """Resident memory of this worker, labelled by pid so workers can be told apart."""
+    labels = {"pid": str(os.getpid())}
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    samples = [("ai_service_process_max_resident_memory_bytes", labels, float(max_rss))]
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        rss = float(rss_pages * os.sysconf("SC_PAGE_SIZE"))
+        samples.append(("ai_service_process_resident_memory_bytes", labels, rss))
+    except (OSError, ValueError):
+        pass
+    return samples
+
+def observe_stage(stage: str, model: str = ""):
+    """Context manager timing one processing stage."""
+    return STAGE_DURATION.time(stage=stage, model=model)
+
+def stats_samples(name: str, stats: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> List[Sample]:
+    """Flatten a nested stats dict into numeric gauge samples named ``name_<key>``."""
+    samples: List[Sample] = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            samples.extend(stats_samples(f"{name}_{key}", value, labels))
+        elif isinstance(value, bool):
+            samples.append((f"{name}_{key}", labels or {}, float(value)))
+        elif isinstance(value, (int, float)):
+            samples.append((f"{name}_{key}", labels or {}, float(value)))
+    return samples
@@ -0,0 +1,112 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+import asyncio
+import time
+from app.core.metrics import REGISTRY
+
+MICRO_BATCH_SIZE = REGISTRY.histogram(
+    "ai_service_micro_batch_size", "Items per micro-batched upstream call", ("name",),
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+MICRO_BATCH_WAIT = REGISTRY.histogram(
+    "ai_service_micro_batch_wait_seconds", "Time the first item of a micro-batch waited before it was sent",
+    ("name",), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.opened_at = time.perf_counter()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submissions that share a key into a single call.
+
+    A batch is sent when it reaches ``max_batch_size`` or ``max_wait`` seconds after
+    its first item arrived. ``send`` receives the key and the items and returns one
+    result per item; a result that is an exception fails only that item, while an
+    exception raised by ``send`` fails the whole batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.005
+    ):
+        self.name = name
+        self.send = send
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch()
+            batch.timer = loop.call_later(self.max_wait, self._flush, key)
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, batch: _Batch) -> None:
+        self.batches += 1
+        self.items += len(batch.items)
+        MICRO_BATCH_SIZE.observe(len(batch.items), name=self.name)
+        MICRO_BATCH_WAIT.observe(time.perf_counter() - batch.opened_at, name=self.name)
+        try:
+            results = await self.send(key, batch.items)
+        except BaseException as e:
+            error = e if isinstance(e, Exception) else ValueError("Micro-batch was cancelled")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        if len(results) != len(batch.futures):
+            error = ValueError(f"Batch returned {len(results)} results for {len(batch.futures)} items")
+            results = [error] * len(batch.futures)
+        for future, result in zip(batch.futures, results):
+            if future.done():
+                # The caller went away; nothing to deliver
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """Send whatever is still queued and wait for in-flight batches."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending_batches": len(self._pending)
+        }
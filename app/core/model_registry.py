@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+from app.core.config import Settings, DEFAULT_GENERATION_PARAMETERS
+
+AUTO_MODEL = "auto"
+
+@dataclass
+class ModelConfig:
+    name: str
+    endpoint_url: str
+    context_window: int = 4096
+    parameters: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_GENERATION_PARAMETERS))
+    weight: float = 1.0
+    fallbacks: List[str] = field(default_factory=list)
+    # Whether the endpoint accepts a list of prompts in one request
+    micro_batching: bool = True
+    # Local tokenizer.json; without one token counts are estimated
+    tokenizer_file: Optional[str] = None
+
+    def max_new_tokens(self, parameters: Optional[Dict[str, Any]] = None) -> int:
+        """The completion tokens a request may ask for: its own ``max_new_tokens``, else this model's default."""
+        default = self.parameters.get("max_new_tokens", 0)
+        try:
+            return int((parameters or {}).get("max_new_tokens", default))
+        except (TypeError, ValueError):
+            return int(default)
+
+class ModelRegistry:
+    """The models this service can route to, loaded from configuration."""
+
+    KNOWN_KEYS = {
+        "repo_id", "endpoint_url", "context_window", "parameters", "weight", "fallbacks", "micro_batching",
+        "tokenizer_file"
+    }
+
+    def __init__(self, models: Dict[str, ModelConfig]):
+        if not models:
+            raise ValueError("Model registry is empty")
+        for model in models.values():
+            unknown = [name for name in model.fallbacks if name not in models]
+            if unknown:
+                raise ValueError(f"Model {model.name} falls back to unknown models: {', '.join(unknown)}")
+            if model.name in model.fallbacks:
+                raise ValueError(f"Model {model.name} lists itself as a fallback")
+        self._models = models
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Dict[str, Any]], api_base_url: str) -> "ModelRegistry":
+        models = {}
+        for name, entry in raw.items():
+            if name == AUTO_MODEL:
+                raise ValueError(f"'{AUTO_MODEL}' is reserved for latency-aware routing")
+            unknown = set(entry) - cls.KNOWN_KEYS
+            if unknown:
+                raise ValueError(f"Model {name} has unknown settings: {', '.join(sorted(unknown))}")
+
+            endpoint_url = entry.get("endpoint_url")
+            if not endpoint_url:
+                if not entry.get("repo_id"):
+                    raise ValueError(f"Model {name} needs a repo_id or an endpoint_url")
+                endpoint_url = f"{api_base_url.rstrip('/')}/{entry['repo_id']}"
+
+            weight = float(entry.get("weight", 1.0))
+            if weight < 0:
+                raise ValueError(f"Model {name} has a negative weight")
+
+            models[name] = ModelConfig(
+                name=name,
+                endpoint_url=endpoint_url,
+                context_window=int(entry.get("context_window", 4096)),
+                parameters=dict(entry.get("parameters") or DEFAULT_GENERATION_PARAMETERS),
+                weight=weight,
+                fallbacks=list(entry.get("fallbacks", [])),
+                micro_batching=bool(entry.get("micro_batching", True)),
+                tokenizer_file=entry.get("tokenizer_file")
+            )
+        return cls(models)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ModelRegistry":
+        raw = settings.MODEL_REGISTRY
+        if settings.MODEL_REGISTRY_FILE:
+            with open(settings.MODEL_REGISTRY_FILE, encoding="utf-8") as f:
+                raw = json.load(f)
+            logging.info("Loaded model registry from %s", settings.MODEL_REGISTRY_FILE)
+        return cls.from_dict(raw, settings.HUGGINGFACE_API_BASE_URL)
+
+    def get(self, name: str) -> ModelConfig:
+        try:
+            return self._models[name]
+        except KeyError:
+            raise ValueError(f"Model {name} not supported. Available models: {', '.join(self.names())}")
+
+    def names(self) -> List[str]:
+        return list(self._models)
+
+    def __iter__(self) -> Iterator[ModelConfig]:
+        return iter(self._models.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._models
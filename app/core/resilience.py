@@ -0,0 +1,127 @@
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+import random
+import time
+
+class UpstreamError(ValueError):
+    """An upstream call failed; carries how the failure should be handled."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+        counts_as_failure: bool = True,
+        kind: str = "error"
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.counts_as_failure = counts_as_failure
+        self.kind = kind
+
+class CircuitOpenError(UpstreamError):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Circuit breaker for {name} is open",
+            status_code=503,
+            retry_after=retry_after,
+            counts_as_failure=False,
+            kind="circuit_open"
+        )
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by an overall deadline."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0, deadline: float = 90.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int, hint: Optional[float] = None) -> float:
+        """Delay before retry number ``attempt``; an upstream hint takes precedence."""
+        if hint is not None:
+            return min(max(hint, 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """
+    Fails fast after consecutive upstream failures.
+
+    After ``recovery_timeout`` the breaker lets a single probe call through
+    (half-open); its outcome closes the breaker or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == self.CLOSED:
+            return
+
+        remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+
+        raise CircuitOpenError(self.name, retry_after=max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """Outcome says nothing about health (e.g. throttling); free the probe slot."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() < self.opened_at + self.recovery_timeout
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+class ResilienceStats:
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.counters, "errors": dict(self.errors)}
@@ -0,0 +1,108 @@
+from types import FrameType
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import gc
+import logging
+import os
+import sys
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn import Config, Server
+from uvicorn.workers import UvicornWorker
+from app.core.config import Settings
+
+class DrainingServer(Server):
+    """
+    Uvicorn server that reports not-ready as soon as it is asked to exit, then keeps
+    serving for ``drain_delay`` seconds so load balancers polling ``/health/ready``
+    stop routing here before the listening socket closes. A second signal exits at once.
+    """
+
+    def __init__(self, config: Config, drain_delay: float):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self.drain_started = False
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        # The lifespan puts the ServiceContainer on app.state once the worker has started
+        container = getattr(getattr(self.config.app, "state", None), "container", None)
+        if self.drain_started or self.drain_delay <= 0 or container is None:
+            super().handle_exit(sig, frame)
+            return
+        self.drain_started = True
+        container.begin_draining()
+        logging.info("Draining for %.1f s before closing the listening socket", self.drain_delay)
+        asyncio.get_event_loop().call_later(self.drain_delay, super().handle_exit, sig, frame)
+
+class ProductionWorker(UvicornWorker):
+    """
+    Uvicorn worker on uvloop/httptools when installed.
+
+    On SIGTERM the worker first drains (see DrainingServer). In-flight requests
+    (including streamed generations) then get the rest of the graceful timeout to
+    finish, minus a margin so the app's own shutdown still runs before the arbiter
+    kills the worker.
+    """
+
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto"}
+    # Set by ProductionServer in the arbiter; workers inherit it when they fork
+    drain_delay = 0.0
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - self.drain_delay - 5, 1)
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(self.config, self.drain_delay)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+class ProductionServer(BaseApplication):
+    """Pre-forking gunicorn arbiter that imports and warms the app once, before workers fork."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        super().__init__()
+
+    def load_config(self) -> None:
+        workers = self.settings.SERVER_WORKERS or os.cpu_count() or 1
+        options: Dict[str, Any] = {
+            "bind": f"{self.settings.SERVER_HOST}:{self.settings.SERVER_PORT}",
+            "workers": workers,
+            "worker_class": f"{ProductionWorker.__module__}.{ProductionWorker.__name__}",
+            "preload_app": True,
+            "graceful_timeout": self.settings.SERVER_GRACEFUL_TIMEOUT,
+            "keepalive": self.settings.SERVER_KEEPALIVE_TIMEOUT
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+        ProductionWorker.drain_delay = self.settings.SERVER_DRAIN_DELAY
+
+    def load(self) -> Callable:
+        # Heavy imports (fastapi, firebase_admin, google.auth) happen here in the arbiter
+        from app.main import app
+        from app.core.language_detector import load_detector
+        from app.core.model_registry import ModelRegistry
+        from app.core.token_budget import load_token_counter
+
+        # Build the n-gram profiles once so every worker shares them copy-on-write.
+        # No detection has run yet, so the executor has not started any threads.
+        load_detector(
+            max_chars=self.settings.LANGUAGE_DETECTION_MAX_CHARS,
+            cache_size=self.settings.LANGUAGE_DETECTION_CACHE_SIZE,
+            max_workers=self.settings.LANGUAGE_DETECTION_THREADS
+        )
+        # Tokenizers are likewise parsed once here rather than in every worker
+        for model in ModelRegistry.from_settings(self.settings):
+            load_token_counter(model.tokenizer_file, self.settings.TOKEN_COUNT_CACHE_SIZE)
+        # Keep the garbage collector from touching (and so copying) the preloaded objects
+        gc.freeze()
+        logging.info("Preloaded application for %d workers", self.cfg.workers)
+        return app
+
+def serve_production(settings: Settings) -> None:
+    settings.validate()
+    ProductionServer(settings).run()
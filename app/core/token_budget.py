@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+from app.core.cache import TTLCache
+from app.core.language_detector import format_prompt
+from app.core.metrics import REGISTRY
+from app.domain.entities.text_generation import TokenUsage
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+PROMPT_TOKENS = REGISTRY.histogram(
+    "ai_service_prompt_tokens", "Prompt tokens per generation, after any truncation", ("model",),
+    buckets=(64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+)
+PROMPTS_OVER_BUDGET = REGISTRY.counter(
+    "ai_service_prompts_over_budget_total", "Prompts that did not fit the model's context window", ("model", "action")
+)
+
+OVERFLOW_ACTIONS = ("reject", "truncate")
+
+# Texts shorter than this are counted on the event loop; a thread hop costs more
+_INLINE_CHARS = 2048
+
+class PromptTooLongError(ValueError):
+    def __init__(self, model: str, prompt_tokens: int, limit: int):
+        super().__init__(
+            f"Prompt is {prompt_tokens} tokens but {model} accepts at most {limit} prompt tokens"
+        )
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.limit = limit
+
+class TokenCounter(ABC):
+    """Counts prompt tokens, caching counts by a hash of the text."""
+
+    def __init__(self, name: str, cache_size: int = 10000):
+        self.name = name
+        self.cache = TTLCache(max_size=cache_size, ttl=float("inf"))
+
+    @abstractmethod
+    def _count(self, text: str) -> int:
+        """Count the tokens in ``text`` without the cache"""
+        pass
+
+    @abstractmethod
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of ``text`` that is at most ``max_tokens`` tokens."""
+        pass
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def _count_uncached(self, key: bytes, text: str) -> int:
+        tokens = self._count(text)
+        self.cache.set(key, tokens)
+        return tokens
+
+    def count(self, text: str) -> int:
+        key = self._key(text)
+        tokens = self.cache.get(key)
+        return tokens if tokens is not None else self._count_uncached(key, text)
+
+    async def count_async(self, text: str) -> int:
+        """Cache hits and short texts are counted inline; long misses in a worker thread."""
+        key = self._key(text)
+        tokens = self.cache.get(key)
+        if tokens is not None:
+            return tokens
+        if len(text) < _INLINE_CHARS:
+            return self._count_uncached(key, text)
+        return await asyncio.to_thread(self._count_uncached, key, text)
+
+    async def truncate_async(self, text: str, max_tokens: int) -> str:
+        if len(text) < _INLINE_CHARS:
+            return self.truncate(text, max_tokens)
+        return await asyncio.to_thread(self.truncate, text, max_tokens)
+
+class HuggingFaceTokenCounter(TokenCounter):
+    """Exact counts from the model's own ``tokenizer.json``."""
+
+    def __init__(self, tokenizer_file: str, cache_size: int = 10000):
+        super().__init__(tokenizer_file, cache_size)
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+
+    def _count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]]
+
+class ApproximateTokenCounter(TokenCounter):
+    """
+    Estimate for models without a tokenizer file: one token per punctuation mark
+    and per four characters of a word. This errs high for English and is close
+    for Turkish, so budgets stay on the safe side of the real context window.
+    """
+
+    _PIECES = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, cache_size: int = 10000):
+        super().__init__("approximate", cache_size)
+
+    def _count(self, text: str) -> int:
+        return sum(math.ceil(len(piece) / 4) for piece in self._PIECES.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = 0
+        for match in self._PIECES.finditer(text):
+            tokens += math.ceil(len(match.group()) / 4)
+            if tokens > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+_counters: Dict[str, TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+def load_token_counter(tokenizer_file: Optional[str] = None, cache_size: int = 10000) -> TokenCounter:
+    """Load each tokenizer once per process; models sharing a file share its counter and cache."""
+    with _counters_lock:
+        key = tokenizer_file or ""
+        counter = _counters.get(key)
+        if counter is None:
+            if tokenizer_file and TOKENIZERS_AVAILABLE:
+                counter = HuggingFaceTokenCounter(tokenizer_file, cache_size)
+                logging.info("Loaded tokenizer from %s", tokenizer_file)
+            else:
+                if tokenizer_file:
+                    logging.warning(
+                        "Tokenizer %s configured but the 'tokenizers' package is not installed, "
+                        "estimating token counts", tokenizer_file
+                    )
+                counter = ApproximateTokenCounter(cache_size)
+            _counters[key] = counter
+        return counter
+
+class TokenBudget:
+    """
+    Fits a prompt and its ``max_new_tokens`` into one model's context window.
+
+    A prompt that leaves fewer than ``min_new_tokens`` for the completion is
+    rejected with PromptTooLongError or, with ``overflow="truncate"``, cut to fit.
+    ``max_new_tokens`` is then lowered to whatever the prompt leaves free.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        counter: TokenCounter,
+        context_window: int,
+        overflow: str = "reject",
+        min_new_tokens: int = 16
+    ):
+        if overflow not in OVERFLOW_ACTIONS:
+            raise ValueError(f"Unknown prompt overflow action: {overflow}. Use one of: {', '.join(OVERFLOW_ACTIONS)}")
+        self.model_name = model_name
+        self.counter = counter
+        self.context_window = context_window
+        self.overflow = overflow
+        self.min_new_tokens = min_new_tokens
+
+    async def fit(
+        self,
+        user_input: str,
+        detected_lang: str,
+        parameters: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any], TokenUsage]:
+        # The system prompt and instruction template are the same for every request in a language
+        template_tokens = await self.counter.count_async(format_prompt("", detected_lang))
+        input_tokens = await self.counter.count_async(user_input)
+
+        try:
+            requested = int(parameters["max_new_tokens"]) if "max_new_tokens" in parameters else None
+        except (TypeError, ValueError):
+            requested = None
+        reserved = self.min_new_tokens if requested is None else min(requested, self.min_new_tokens)
+        input_limit = self.context_window - template_tokens - reserved
+
+        truncated = False
+        if input_tokens > input_limit:
+            if self.overflow == "reject" or input_limit <= 0:
+                PROMPTS_OVER_BUDGET.inc(model=self.model_name, action="rejected")
+                raise PromptTooLongError(self.model_name, template_tokens + input_tokens, template_tokens + input_limit)
+            PROMPTS_OVER_BUDGET.inc(model=self.model_name, action="truncated")
+            user_input = await self.counter.truncate_async(user_input, input_limit)
+            input_tokens = await self.counter.count_async(user_input)
+            truncated = True
+
+        prompt_tokens = template_tokens + input_tokens
+        PROMPT_TOKENS.observe(prompt_tokens, model=self.model_name)
+        available = self.context_window - prompt_tokens
+        if requested is not None and requested > available:
+            parameters = {**parameters, "max_new_tokens": available}
+            requested = available
+        return user_input, parameters, TokenUsage(
+            prompt_tokens=prompt_tokens,
+            max_new_tokens=requested,
+            truncated=truncated
+        )
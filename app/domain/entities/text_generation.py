@@ -6,7 +6,33 @@ class TextGenerationRequest:
     inputs: str
     parameters: Optional[Dict[str, Any]] = None
 
+@dataclass
+class TokenUsage:
+    prompt_tokens: int
+    max_new_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    truncated: bool = False
+
 @dataclass
 class TextGenerationResponse:
     generated_text: str
     detected_language: str
+    model: Optional[str] = None
+    usage: Optional[TokenUsage] = None
+    # Served from the generation cache rather than by the upstream
+    cached: bool = False
+
+@dataclass
+class TextGenerationChunk:
+    token: str
+    detected_language: str
+    generated_text: Optional[str] = None
+    model: Optional[str] = None
+    # Set on the final chunk only
+    usage: Optional[TokenUsage] = None
+
+@dataclass
+class BatchItemResult:
+    index: int
+    response: Optional[TextGenerationResponse] = None
+    error: Optional[str] = None
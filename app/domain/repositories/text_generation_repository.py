@@ -1,8 +1,25 @@
 from abc import ABC, abstractmethod
-from app.domain.entities.text_generation import TextGenerationRequest, TextGenerationResponse
+from typing import AsyncIterator, List
+from app.domain.entities.text_generation import (
+    TextGenerationRequest, TextGenerationResponse, TextGenerationChunk, BatchItemResult
+)
 
 class TextGenerationRepository(ABC):
     @abstractmethod
     async def generate_text(self, request: TextGenerationRequest) -> TextGenerationResponse:
         """Generate text based on the input request"""
         pass
+
+    @abstractmethod
+    def stream_text(self, request: TextGenerationRequest) -> AsyncIterator[TextGenerationChunk]:
+        """Stream generated tokens as they are produced; the last chunk carries the full text"""
+        pass
+
+    @abstractmethod
+    def generate_batch(
+        self,
+        requests: List[TextGenerationRequest],
+        max_concurrency: int
+    ) -> AsyncIterator[BatchItemResult]:
+        """Generate text for every request, yielding per-item results as they complete"""
+        pass
@@ -1,4 +1,7 @@
-from app.domain.entities.text_generation import TextGenerationRequest, TextGenerationResponse
+from typing import AsyncIterator, List
+from app.domain.entities.text_generation import (
+    TextGenerationRequest, TextGenerationResponse, TextGenerationChunk, BatchItemResult
+)
 from app.domain.repositories.text_generation_repository import TextGenerationRepository
 
 class GenerateTextUseCase:
@@ -7,3 +10,24 @@ class GenerateTextUseCase:
 
     async def execute(self, request: TextGenerationRequest) -> TextGenerationResponse:
         return await self.text_generation_repository.generate_text(request)
+
+    async def stream(self, request: TextGenerationRequest) -> AsyncIterator[TextGenerationChunk]:
+        chunks = self.text_generation_repository.stream_text(request)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # Closing the inner generator releases the upstream connection
+            await chunks.aclose()
+
+    async def execute_batch(
+        self,
+        requests: List[TextGenerationRequest],
+        max_concurrency: int
+    ) -> AsyncIterator[BatchItemResult]:
+        results = self.text_generation_repository.generate_batch(requests, max_concurrency)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
@@ -0,0 +1,250 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from app.domain.entities.text_generation import TextGenerationResponse
+
+class GenerationCacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key, or None when absent or expired"""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry under key"""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class InMemoryGenerationCache(GenerationCacheBackend):
+    """LRU cache bounded by the serialised size of its entries, with a TTL."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        entry, size, expires_at = item
+        if expires_at <= time.monotonic():
+            self._evict(key)
+            return None
+
+        self._data.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Dict[str, Any]) -> None:
+        size = len(json.dumps(entry, ensure_ascii=False).encode()) + len(key)
+        if size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._evict(key)
+        self._data[key] = (entry, size, time.monotonic() + self.ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._data)))
+
+    def _evict(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+class SQLiteGenerationCache(GenerationCacheBackend):
+    """
+    On-disk cache that survives restarts and can be shared by workers on one host.
+
+    Expired and surplus rows are swept every ``evict_every`` inserts rather than on
+    each one, so the table may run that many rows over ``max_entries`` in between.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int = 100000, evict_every: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every or max(1, max_entries // 100)
+        self._inserts_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations "
+            "(key TEXT PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generations_expires_at ON generations (expires_at)")
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry FROM generations WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, entry: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (key, entry, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(entry, ensure_ascii=False), now + self.ttl)
+            )
+            self._inserts_since_evict += 1
+            if self._inserts_since_evict >= self.evict_every:
+                self._inserts_since_evict = 0
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Counting walks the table, so this runs once per batch of inserts; the deletes
+        # only touch the oldest rows through the expires_at index
+        self._conn.execute("DELETE FROM generations WHERE expires_at <= ?", (now,))
+        entries = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        if entries > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM generations WHERE key IN (SELECT key FROM generations "
+                "ORDER BY expires_at LIMIT ?)", (entries - self.max_entries,)
+            )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, entry: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set, key, entry)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        return {"entries": entries, "max_entries": self.max_entries}
+
+class GenerationCache:
+    """
+    Caches deterministic generations and coalesces concurrent identical requests
+    so they share a single upstream call.
+    """
+
+    def __init__(self, backend: GenerationCacheBackend, max_temperature: float = 0.1):
+        self.backend = backend
+        self.max_temperature = max_temperature
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_upstream_seconds = 0.0
+
+    def is_cacheable(self, parameters: Dict[str, Any]) -> bool:
+        if not parameters.get("do_sample", False):
+            return True
+        temperature = parameters.get("temperature")
+        return temperature is not None and temperature <= self.max_temperature
+
+    def key_for(self, model_name: str, prompt: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """Build the cache key, or return None when the parameters are not cacheable."""
+        if not self.is_cacheable(parameters):
+            return None
+        material = json.dumps(
+            {"model": model_name, "prompt": " ".join(prompt.split()), "parameters": parameters},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[TextGenerationResponse]]
+    ) -> TextGenerationResponse:
+        entry = await self.backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.saved_upstream_seconds += entry["upstream_seconds"]
+            return TextGenerationResponse(
+                generated_text=entry["generated_text"],
+                detected_language=entry["detected_language"],
+                cached=True
+            )
+
+        in_flight = self._in_flight.get(key)
+        # A generation cancelled after its last caller left cannot be joined any more
+        if in_flight is not None and not in_flight["task"].cancelling():
+            self.coalesced += 1
+            in_flight["waiters"] += 1
+        else:
+            self.misses += 1
+            in_flight = {"waiters": 0, "callers": 0}
+            # The generation belongs to the cache rather than to the first caller, so a
+            # caller that disconnects does not fail the requests coalesced onto it
+            in_flight["task"] = asyncio.create_task(self._generate_and_store(key, generate, in_flight))
+            in_flight["task"].add_done_callback(lambda task: self._finish(key, in_flight))
+            self._in_flight[key] = in_flight
+
+        in_flight["callers"] += 1
+        try:
+            return await asyncio.shield(in_flight["task"])
+        except asyncio.CancelledError:
+            # Only give up on the upstream call once nobody is waiting for it
+            if in_flight["callers"] == 1:
+                in_flight["task"].cancel()
+            raise
+        finally:
+            in_flight["callers"] -= 1
+
+    async def _generate_and_store(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[TextGenerationResponse]],
+        in_flight: Dict[str, Any]
+    ) -> TextGenerationResponse:
+        started = time.perf_counter()
+        response = await generate()
+        upstream_seconds = time.perf_counter() - started
+
+        self.saved_upstream_seconds += upstream_seconds * in_flight["waiters"]
+        try:
+            await self.backend.set(key, {
+                "generated_text": response.generated_text,
+                "detected_language": response.detected_language,
+                "upstream_seconds": upstream_seconds
+            })
+        except Exception as e:
+            logging.warning("Failed to store generation in cache: %s", str(e))
+        return response
+
+    def _finish(self, key: str, in_flight: Dict[str, Any]) -> None:
+        # Runs even when the task was cancelled before it started
+        if self._in_flight.get(key) is in_flight:
+            del self._in_flight[key]
+        task = in_flight["task"]
+        if not task.cancelled():
+            # Retrieve the exception so a generation nobody waits for any more does not warn
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "saved_upstream_seconds": self.saved_upstream_seconds,
+            "in_flight": len(self._in_flight),
+            "backend": self.backend.stats()
+        }
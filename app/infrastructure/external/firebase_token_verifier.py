@@ -0,0 +1,136 @@
+from firebase_admin import auth
+from google.auth import jwt
+from typing import Dict, Any, Optional
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import httpx
+from app.core.cache import TTLCache
+from app.core.metrics import observe_stage
+
+class FirebaseTokenVerifier:
+    """
+    Verifies Firebase ID tokens locally against Google's public signing certificates.
+
+    Certificates are refreshed in the background before they expire, and verified
+    claims are cached by token hash until the token's own ``exp``.
+    """
+
+    ISSUER_PREFIX = "https://securetoken.google.com/"
+
+    def __init__(
+        self,
+        project_id: str,
+        certs_url: str,
+        cache_size: int = 10000,
+        cache_ttl: float = 3600.0,
+        refresh_margin: float = 300.0
+    ):
+        self.project_id = project_id
+        self.certs_url = certs_url
+        self.refresh_margin = refresh_margin
+        self.token_cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.local_verifications = 0
+        self.remote_verifications = 0
+
+    async def start(self) -> None:
+        try:
+            await self.refresh_certs()
+        except Exception as e:
+            logging.warning("Initial Firebase certificate fetch failed: %s", str(e))
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def refresh_certs(self) -> None:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        max_age = 3600
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        if match:
+            max_age = int(match.group(1))
+
+        self._certs = response.json()
+        self._certs_expire_at = time.time() + max_age
+        logging.info("Refreshed %d Firebase signing certificates (max-age %ds)", len(self._certs), max_age)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = max(self._certs_expire_at - time.time() - self.refresh_margin, 60.0)
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh_certs()
+            except Exception as e:
+                logging.warning("Firebase certificate refresh failed, retrying: %s", str(e))
+                self._certs_expire_at = time.time() + self.refresh_margin + 60.0
+
+    async def verify(self, id_token: str) -> Dict[str, Any]:
+        """Return the decoded claims of a valid token; raise ValueError otherwise."""
+        with observe_stage("auth_verify"):
+            return await self._verify(id_token)
+
+    async def _verify(self, id_token: str) -> Dict[str, Any]:
+        key = hashlib.sha256(id_token.encode()).hexdigest()
+        claims = self.token_cache.get(key)
+        if claims is not None:
+            return claims
+
+        if self._can_verify_locally(id_token):
+            claims = self._verify_locally(id_token)
+            self.local_verifications += 1
+        else:
+            try:
+                claims = await asyncio.to_thread(auth.verify_id_token, id_token)
+            except auth.InvalidIdTokenError as e:
+                raise ValueError(f"Invalid Firebase ID token: {str(e)}")
+            self.remote_verifications += 1
+
+        ttl = min(claims["exp"] - time.time(), self.token_cache.ttl)
+        if ttl > 0:
+            self.token_cache.set(key, claims, ttl=ttl)
+        return claims
+
+    def _can_verify_locally(self, id_token: str) -> bool:
+        if not self._certs or self._certs_expire_at <= time.time():
+            return False
+        try:
+            return jwt.decode_header(id_token).get("kid") in self._certs
+        except Exception:
+            return False
+
+    def _verify_locally(self, id_token: str) -> Dict[str, Any]:
+        try:
+            claims = jwt.decode(id_token, certs=self._certs, audience=self.project_id)
+        except Exception as e:
+            raise ValueError(f"Invalid Firebase ID token: {str(e)}")
+
+        if claims.get("iss") != self.ISSUER_PREFIX + self.project_id:
+            raise ValueError("Invalid Firebase ID token: unexpected issuer")
+        if not claims.get("sub") or len(claims["sub"]) > 128:
+            raise ValueError("Invalid Firebase ID token: missing or invalid subject")
+
+        claims["uid"] = claims["sub"]
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.token_cache.stats(),
+            "local_verifications": self.local_verifications,
+            "remote_verifications": self.remote_verifications,
+            "certificates": len(self._certs),
+            "certificates_expire_in": max(self._certs_expire_at - time.time(), 0.0)
+        }
@@ -0,0 +1,87 @@
+import httpx
+from typing import Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
+import logging
+from app.core.config import Settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HttpClientPool:
+    """App-lifetime pool of keep-alive httpx clients, one per upstream model."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.http2 = settings.HTTP_HTTP2 and HTTP2_AVAILABLE
+        if settings.HTTP_HTTP2 and not HTTP2_AVAILABLE:
+            logging.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        self.timeout = httpx.Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_WRITE_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get_client(self, key: str) -> httpx.AsyncClient:
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+            self._clients[key] = client
+            self._stats.setdefault(key, {"requests": 0, "in_flight": 0, "peak_in_flight": 0})
+        return client
+
+    @asynccontextmanager
+    async def request(self, key: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the client for ``key`` while tracking in-flight requests."""
+        client = self.get_client(key)
+        stats = self._stats[key]
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            yield client
+        finally:
+            stats["in_flight"] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Report per-model pool utilisation for sizing the limits."""
+        clients = {}
+        for key, client in self._clients.items():
+            # httpcore does not expose pool state publicly; read it defensively
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            clients[key] = {
+                **self._stats[key],
+                "connections": len(connections),
+                "idle_connections": sum(1 for c in connections if c.is_idle()),
+                "closed": client.is_closed
+            }
+
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "clients": clients
+        }
+
+    async def aclose(self) -> None:
+        for key, client in self._clients.items():
+            await client.aclose()
+            logging.info("Closed HTTP client pool for %s", key)
+        self._clients.clear()
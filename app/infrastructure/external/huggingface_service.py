@@ -1,82 +1,446 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+from dataclasses import replace
 import os
+import json
 import asyncio
-from app.domain.entities.text_generation import TextGenerationRequest, TextGenerationResponse
+import time
+from app.domain.entities.text_generation import (
+    TextGenerationRequest, TextGenerationResponse, TextGenerationChunk, BatchItemResult, TokenUsage
+)
 from app.domain.repositories.text_generation_repository import TextGenerationRepository
-from app.core.language_detector import detect_language, format_prompt
+from app.core.language_detector import detect_language_async, format_prompt
+from app.infrastructure.external.http_client_pool import HttpClientPool
+from app.infrastructure.cache.generation_cache import GenerationCache
+from app.core.model_registry import ModelConfig
+from app.core.micro_batcher import MicroBatcher
+from app.core.token_budget import TokenBudget
+from app.core.metrics import observe_stage, UPSTREAM_RESPONSES, UPSTREAM_IN_FLIGHT, UPSTREAM_RETRIES
+from app.core.resilience import (
+    UpstreamError, RetryPolicy, CircuitBreaker, LatencyTracker, ResilienceStats
+)
+
+def classify_response(response: httpx.Response) -> UpstreamError:
+    """Turn a non-successful upstream response into an UpstreamError."""
+    status = response.status_code
+    retry_after = None
+    header = response.headers.get("retry-after")
+    if header:
+        try:
+            retry_after = float(header)
+        except ValueError:
+            pass
+
+    detail = response.text[:500]
+    if status == 503:
+        # Model cold start: the body reports how long loading should take
+        try:
+            body = response.json()
+            if isinstance(body, dict) and "estimated_time" in body:
+                retry_after = retry_after or float(body["estimated_time"])
+                return UpstreamError(
+                    f"Model is loading: {body.get('error', detail)}",
+                    status_code=status, retryable=True, retry_after=retry_after,
+                    counts_as_failure=False, kind="model_loading"
+                )
+        except ValueError:
+            pass
+        return UpstreamError(detail, status_code=status, retryable=True, retry_after=retry_after, kind="unavailable")
+    if status == 429:
+        return UpstreamError(
+            detail, status_code=status, retryable=True, retry_after=retry_after,
+            counts_as_failure=False, kind="rate_limited"
+        )
+    if status >= 500:
+        return UpstreamError(detail, status_code=status, retryable=True, retry_after=retry_after, kind="server_error")
+    return UpstreamError(detail, status_code=status, counts_as_failure=False, kind="client_error")
 
 class HuggingFaceService(TextGenerationRepository):
-    MODELS = {
-        "mistral": "mistralai/Mistral-7B-Instruct-v0.2",
-        "mixtral": "mistralai/Mixtral-8x7B-Instruct-v0.1"
-    }
-
-    def __init__(self, model_name: str = "mistral"):
-        if model_name not in self.MODELS:
-            raise ValueError(f"Model {model_name} not supported. Available models: {', '.join(self.MODELS.keys())}")
-            
-        self.model_name = model_name
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.MODELS[model_name]}"
+    # Used when a cold-loading model does not report an estimated_time
+    DEFAULT_LOADING_SECONDS = 20.0
+
+    def __init__(
+        self,
+        client_pool: HttpClientPool,
+        model: ModelConfig,
+        generation_cache: Optional[GenerationCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        micro_batch_size: int = 1,
+        micro_batch_wait: float = 0.005,
+        token_budget: Optional[TokenBudget] = None
+    ):
+        self.model = model
+        self.model_name = model.name
+        self.client_pool = client_pool
+        self.generation_cache = generation_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(model.name)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self.stats = ResilienceStats()
+        self.api_url = model.endpoint_url
+        self.loading_until = 0.0
+        self.token_budget = token_budget
+        self.micro_batcher: Optional[MicroBatcher] = None
+        if micro_batch_size > 1:
+            self.micro_batcher = MicroBatcher(
+                model.name, self._send_micro_batch, max_batch_size=micro_batch_size, max_wait=micro_batch_wait
+            )
         self.token = os.getenv("HUGGINGFACE_TOKEN")
         if not self.token:
             raise ValueError("HUGGINGFACE_TOKEN environment variable is not set")
 
-    async def generate_text(self, request: TextGenerationRequest) -> TextGenerationResponse:
-        max_retries = 3
-        retry_count = 0
-        
-        detected_lang = detect_language(request.inputs)
-        formatted_prompt = format_prompt(request.inputs, detected_lang)
-
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
 
-        default_params = {
-            "max_new_tokens": 1024,
-            "temperature": 0.1,
-            "top_p": 0.1,
-            "do_sample": True,
-            "return_full_text": False,
-            "repetition_penalty": 1.2
-        }
+    async def _build_payload(
+        self,
+        request: TextGenerationRequest
+    ) -> Tuple[str, Dict[str, Any], Optional[TokenUsage]]:
+        with observe_stage("language_detection", self.model_name):
+            detected_lang = await detect_language_async(request.inputs)
+
+        inputs = request.inputs
+        parameters = request.parameters or self.model.parameters
+        usage = None
+        if self.token_budget is not None:
+            # Oversized prompts are rejected (or cut) here instead of failing upstream
+            with observe_stage("token_budget", self.model_name):
+                inputs, parameters, usage = await self.token_budget.fit(inputs, detected_lang, parameters)
+
+        with observe_stage("prompt_formatting", self.model_name):
+            formatted_prompt = format_prompt(inputs, detected_lang)
 
         payload = {
             "inputs": formatted_prompt,
-            "parameters": request.parameters or default_params
+            "parameters": parameters
         }
+        return detected_lang, payload, usage
+
+    async def _with_usage(
+        self,
+        response: TextGenerationResponse,
+        usage: Optional[TokenUsage]
+    ) -> TextGenerationResponse:
+        if usage is None:
+            return response
+        completion_tokens = await self.token_budget.counter.count_async(response.generated_text)
+        return replace(response, usage=replace(usage, completion_tokens=completion_tokens))
+
+    def is_loading(self) -> bool:
+        """Whether the upstream recently reported this model as cold-loading."""
+        return time.monotonic() < self.loading_until
+
+    def _track_loading(self, error: UpstreamError) -> None:
+        if error.kind == "model_loading":
+            self.loading_until = time.monotonic() + (error.retry_after or self.DEFAULT_LOADING_SECONDS)
+
+    async def generate_text(self, request: TextGenerationRequest, fail_fast: bool = False) -> TextGenerationResponse:
+        """
+        Generate a completion. With ``fail_fast`` a cold-loading model raises at once
+        instead of waiting out its load, so the caller can fall back to another model.
+        """
+        detected_lang, payload, usage = await self._build_payload(request)
+        response = await self._generate_cached(detected_lang, payload, fail_fast)
+        return await self._with_usage(response, usage)
+
+    async def _generate_cached(
+        self,
+        detected_lang: str,
+        payload: Dict[str, Any],
+        fail_fast: bool = False
+    ) -> TextGenerationResponse:
+        cache_key = None
+        if self.generation_cache is not None:
+            cache_key = self.generation_cache.key_for(self.model_name, payload["inputs"], payload["parameters"])
+        if cache_key is None:
+            return await self._generate(detected_lang, payload, fail_fast)
+
+        return await self.generation_cache.get_or_generate(
+            cache_key,
+            lambda: self._generate(detected_lang, payload, fail_fast)
+        )
+
+    async def _post_once(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.stats.counters["attempts"] += 1
+        started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc(model=self.model_name)
+        try:
+            with observe_stage("upstream_call", self.model_name):
+                async with self.client_pool.request(self.model_name) as client:
+                    response = await client.post(self.api_url, json=payload, headers=self._headers())
+        except httpx.TimeoutException as e:
+            UPSTREAM_RESPONSES.inc(model=self.model_name, status="timeout")
+            raise UpstreamError(f"Timeout calling Hugging Face API: {str(e)}", retryable=True, kind="timeout")
+        except httpx.TransportError as e:
+            UPSTREAM_RESPONSES.inc(model=self.model_name, status="transport_error")
+            raise UpstreamError(f"Transport error calling Hugging Face API: {str(e)}", retryable=True, kind="transport")
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(model=self.model_name)
+
+        UPSTREAM_RESPONSES.inc(model=self.model_name, status=str(response.status_code))
+        if response.status_code != 200:
+            raise classify_response(response)
+
+        result = response.json()
+        if not isinstance(result, list) or len(result) == 0:
+            raise UpstreamError(f"Unexpected Hugging Face API response: {str(result)[:500]}", status_code=502, kind="bad_response")
+
+        self.latency.record(time.perf_counter() - started)
+        return result
+
+    async def _post_hedged(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Send a second identical request if the first is slower than the hedge percentile."""
+        threshold = None
+        if self.hedge_percentile is not None:
+            threshold = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        if threshold is None:
+            return await self._post_once(payload)
+
+        primary = asyncio.create_task(self._post_once(payload))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return primary.result()
+
+            self.stats.counters["hedges"] += 1
+            hedge = asyncio.create_task(self._post_once(payload))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.counters["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _generate(
+        self,
+        detected_lang: str,
+        payload: Dict[str, Any],
+        fail_fast: bool = False
+    ) -> TextGenerationResponse:
+        if self.micro_batcher is not None:
+            # Requests can only share an upstream call when they ask for the same parameters
+            key = (json.dumps(payload["parameters"], sort_keys=True), fail_fast)
+            result = await self.micro_batcher.submit(key, payload["inputs"])
+        else:
+            result = await self._call_upstream(payload, fail_fast)
+        return TextGenerationResponse(
+            generated_text=result[0].get("generated_text", "").strip(),
+            detected_language=detected_lang,
+            model=self.model_name
+        )
+
+    async def _send_micro_batch(
+        self,
+        key: Tuple[str, bool],
+        inputs: List[str]
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """Send queued prompts as one list-input request and split the result per prompt."""
+        parameters_json, fail_fast = key
+        parameters = json.loads(parameters_json)
+        if len(inputs) == 1:
+            return [await self._call_upstream({"inputs": inputs[0], "parameters": parameters}, fail_fast)]
 
-        while retry_count < max_retries:
+        try:
+            result = await self._call_upstream({"inputs": inputs, "parameters": parameters}, fail_fast)
+        except UpstreamError as e:
+            if e.kind != "client_error":
+                raise
+            # A single bad prompt rejects the whole list; send them separately so the others succeed
+            self.stats.counters["micro_batch_splits"] += 1
+            return await asyncio.gather(
+                *(self._call_upstream({"inputs": prompt, "parameters": parameters}, fail_fast) for prompt in inputs),
+                return_exceptions=True
+            )
+
+        items: List[Union[List[Dict[str, Any]], Exception]] = []
+        for index in range(len(inputs)):
+            # One entry per prompt: a list of generations, or a bare generation object
+            entry = result[index] if index < len(result) else None
+            if isinstance(entry, dict):
+                entry = [entry]
+            if isinstance(entry, list) and entry and isinstance(entry[0], dict):
+                items.append(entry)
+            else:
+                items.append(UpstreamError(
+                    f"Unexpected Hugging Face API batch item: {str(entry)[:200]}", status_code=502, kind="bad_response"
+                ))
+        return items
+
+    async def _call_upstream(self, payload: Dict[str, Any], fail_fast: bool = False) -> List[Any]:
+        """POST ``payload`` with retries, backoff, hedging and the circuit breaker."""
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.deadline
+        attempt = 0
+
+        while True:
             try:
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.post(
-                        self.api_url,
-                        json=payload,
-                        headers=headers
+                self.circuit_breaker.before_call()
+            except UpstreamError:
+                self.stats.counters["breaker_rejections"] += 1
+                raise
+
+            attempt += 1
+            try:
+                remaining = deadline - time.monotonic()
+                try:
+                    result = await asyncio.wait_for(self._post_hedged(payload), timeout=remaining)
+                except asyncio.TimeoutError:
+                    raise UpstreamError(
+                        f"Hugging Face API deadline of {policy.deadline}s exceeded", kind="deadline"
                     )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        if isinstance(result, list) and len(result) > 0:
-                            return TextGenerationResponse(
-                                generated_text=result[0].get("generated_text", "").strip(),
-                                detected_language=detected_lang
-                            )
-                    
-                    if response.status_code == 503:
-                        retry_count += 1
-                        if retry_count < max_retries:
-                            await asyncio.sleep(2)
+                self.circuit_breaker.record_success()
+                self.loading_until = 0.0
+                return result
+            except UpstreamError as e:
+                self.stats.errors[e.kind] += 1
+                self._track_loading(e)
+                if e.counts_as_failure:
+                    self.circuit_breaker.record_failure()
+                else:
+                    # Not a health signal; release a half-open probe slot without judging
+                    self.circuit_breaker.record_neutral()
+
+                if not e.retryable or attempt >= policy.max_attempts or (fail_fast and e.kind == "model_loading"):
+                    raise UpstreamError(
+                        f"Error calling Hugging Face API after {attempt} attempts: {str(e)}",
+                        status_code=e.status_code, retry_after=e.retry_after,
+                        counts_as_failure=e.counts_as_failure, kind=e.kind
+                    )
+
+                delay = policy.backoff(attempt, e.retry_after)
+                if time.monotonic() + delay >= deadline:
+                    raise UpstreamError(
+                        f"Hugging Face API deadline of {policy.deadline}s exceeded after {attempt} attempts: {str(e)}",
+                        status_code=e.status_code, retry_after=e.retry_after, kind=e.kind
+                    )
+                self.stats.counters["retries"] += 1
+                UPSTREAM_RETRIES.inc(model=self.model_name, kind=e.kind)
+                with observe_stage("retry_backoff", self.model_name):
+                    await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled (e.g. client went away): do not leave a half-open probe slot taken
+                self.circuit_breaker.record_neutral()
+                raise
+
+    async def generate_batch(
+        self,
+        requests: List[TextGenerationRequest],
+        max_concurrency: int
+    ) -> AsyncIterator[BatchItemResult]:
+        # Prepare every prompt before fanning out so only upstream calls are concurrent
+        prepared = await asyncio.gather(
+            *(self._build_payload(request) for request in requests),
+            return_exceptions=True
+        )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(
+            index: int,
+            detected_lang: str,
+            payload: Dict[str, Any],
+            usage: Optional[TokenUsage]
+        ) -> BatchItemResult:
+            async with semaphore:
+                try:
+                    response = await self._generate_cached(detected_lang, payload)
+                    return BatchItemResult(index=index, response=await self._with_usage(response, usage))
+                except Exception as e:
+                    return BatchItemResult(index=index, error=str(e))
+
+        # Items whose prompt was rejected (e.g. over the token budget) fail on their own
+        for index, item in enumerate(prepared):
+            if isinstance(item, Exception):
+                yield BatchItemResult(index=index, error=str(item))
+            elif isinstance(item, BaseException):
+                raise item
+
+        tasks = [
+            asyncio.create_task(run(index, *item))
+            for index, item in enumerate(prepared)
+            if not isinstance(item, BaseException)
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_text(self, request: TextGenerationRequest) -> AsyncIterator[TextGenerationChunk]:
+        detected_lang, payload, usage = await self._build_payload(request)
+        payload["stream"] = True
+
+        self.circuit_breaker.before_call()
+        try:
+            async with self.client_pool.request(self.model_name) as client:
+                async with client.stream("POST", self.api_url, json=payload, headers=self._headers()) as response:
+                    UPSTREAM_RESPONSES.inc(model=self.model_name, status=str(response.status_code))
+                    if response.status_code != 200:
+                        await response.aread()
+                        error = classify_response(response)
+                        self._track_loading(error)
+                        if error.counts_as_failure:
+                            self.circuit_breaker.record_failure()
+                        else:
+                            self.circuit_breaker.record_neutral()
+                        raise error
+                    self.circuit_breaker.record_success()
+                    self.loading_until = 0.0
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
                             continue
-                    
-                    response.raise_for_status()
-                    
-            except Exception as e:
-                retry_count += 1
-                if retry_count >= max_retries:
-                    raise ValueError(f"Error calling Hugging Face API after {max_retries} attempts: {str(e)}")
-                await asyncio.sleep(2)
-                
-        raise ValueError("Maximum retries reached")
+
+                        event = json.loads(line[len("data:"):].strip())
+                        if "error" in event:
+                            raise ValueError(f"Hugging Face API stream error: {event['error']}")
+
+                        token = event.get("token") or {}
+                        generated_text = event.get("generated_text")
+                        if token.get("special") and generated_text is None:
+                            continue
+
+                        chunk = TextGenerationChunk(
+                            token="" if token.get("special") else token.get("text", ""),
+                            detected_language=detected_lang,
+                            generated_text=generated_text.strip() if generated_text is not None else None,
+                            model=self.model_name
+                        )
+                        if chunk.generated_text is not None and usage is not None:
+                            completion_tokens = await self.token_budget.counter.count_async(chunk.generated_text)
+                            chunk = replace(chunk, usage=replace(usage, completion_tokens=completion_tokens))
+                        yield chunk
+        except httpx.TransportError as e:
+            self.circuit_breaker.record_failure()
+            raise UpstreamError(f"Error streaming from Hugging Face API: {str(e)}", retryable=True, kind="transport")
+        except BaseException:
+            self.circuit_breaker.record_neutral()
+            raise
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "circuit_state": self.circuit_breaker.state,
+            "loading": self.is_loading(),
+            "micro_batching": self.micro_batcher.stats() if self.micro_batcher is not None else None,
+            "consecutive_failures": self.circuit_breaker.consecutive_failures,
+            "hedge_threshold": self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+            if self.hedge_percentile is not None else None
+        }
@@ -0,0 +1,276 @@
+from dataclasses import replace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import logging
+import random
+import time
+from app.domain.entities.text_generation import (
+    TextGenerationRequest, TextGenerationResponse, TextGenerationChunk, BatchItemResult
+)
+from app.domain.repositories.text_generation_repository import TextGenerationRepository
+from app.core.admission import AdmissionController, AdmissionRejected
+from app.core.model_registry import ModelRegistry, AUTO_MODEL
+from app.core.metrics import REGISTRY
+from app.core.resilience import UpstreamError
+from app.infrastructure.external.huggingface_service import HuggingFaceService
+
+MODEL_ROUTED = REGISTRY.counter(
+    "ai_service_model_routed_total", "Generations by requested and serving model", ("requested", "model")
+)
+MODEL_FALLBACKS = REGISTRY.counter(
+    "ai_service_model_fallbacks_total", "Generations moved to a fallback model",
+    ("requested", "from_model", "to_model", "reason")
+)
+
+# Errors that say "try another model" rather than "this request is bad"
+FALLBACK_ERROR_KINDS = {"model_loading", "circuit_open"}
+
+class ModelHealth:
+    """
+    Exponentially weighted moving averages of a model's error rate, its latency for
+    full generations and its time to first token for streams. The two latencies are
+    kept apart because they are not comparable.
+    """
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.first_token_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def _ewma(self, average: Optional[float], sample: float) -> float:
+        return sample if average is None else self.alpha * sample + (1 - self.alpha) * average
+
+    def record_success(self, seconds: Optional[float] = None, first_token_seconds: Optional[float] = None) -> None:
+        self.samples += 1
+        self.error_rate *= 1 - self.alpha
+        if seconds is not None:
+            self.latency = self._ewma(self.latency, seconds)
+        if first_token_seconds is not None:
+            self.first_token_latency = self._ewma(self.first_token_latency, first_token_seconds)
+
+    def record_failure(self) -> None:
+        self.samples += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+
+class ModelRouter:
+    """
+    Chooses which model serves a generation and falls back when it cannot.
+
+    A named model is tried first and then its configured fallbacks; ``auto`` ranks
+    every model with a positive weight by EWMA latency (time to first token for
+    streams), penalised by error rate.
+    Models that are cold-loading or whose breaker is open move to the back of the
+    order, and every candidate except the last fails fast on a cold start so the
+    request moves on instead of waiting for the model to load.
+
+    In-flight slots are taken from the admission controller for the model that is
+    about to serve the request, so ``auto`` and fallback traffic count against the
+    models they actually reach. Only the last candidate queues for a slot; a busy
+    model with somewhere to fall back to is skipped.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        services: Dict[str, HuggingFaceService],
+        ewma_alpha: float = 0.2,
+        error_penalty: float = 5.0,
+        exploration_rate: float = 0.05,
+        admission: Optional[AdmissionController] = None
+    ):
+        self.registry = registry
+        self.services = services
+        self.admission = admission
+        self.error_penalty = error_penalty
+        self.exploration_rate = exploration_rate
+        self.health: Dict[str, ModelHealth] = {name: ModelHealth(ewma_alpha) for name in services}
+
+    def _latency(self, name: str, stream: bool) -> Optional[float]:
+        health = self.health[name]
+        return health.first_token_latency if stream else health.latency
+
+    def score(self, name: str, stream: bool = False) -> Optional[float]:
+        """
+        Lower is better. A model without latency samples is assumed to be as fast as
+        the average sampled model, so it neither wins every request by default nor
+        is starved; exploration gets it its first samples.
+        """
+        health = self.health[name]
+        weight = self.registry.get(name).weight
+        if weight <= 0:
+            return None
+        latency = self._latency(name, stream)
+        if latency is None:
+            sampled = [value for value in (self._latency(other, stream) for other in self.health) if value is not None]
+            if not sampled:
+                return 0.0
+            latency = sum(sampled) / len(sampled)
+        return latency * (1 + self.error_penalty * health.error_rate) / weight
+
+    def is_available(self, name: str) -> bool:
+        service = self.services[name]
+        return not service.is_loading() and not service.circuit_breaker.is_open()
+
+    def candidates(self, requested: str, stream: bool = False) -> List[str]:
+        if requested == AUTO_MODEL:
+            ranked = sorted(
+                (model.name for model in self.registry if model.weight > 0),
+                key=lambda name: self.score(name, stream)
+            )
+            if not ranked:
+                raise ValueError("No model has a positive weight for auto routing")
+            # Occasionally promote another model so its latency estimate does not go stale
+            if len(ranked) > 1 and random.random() < self.exploration_rate:
+                others = ranked[1:]
+                explored = random.choices(others, weights=[self.registry.get(n).weight for n in others])[0]
+                ranked.remove(explored)
+                ranked.insert(0, explored)
+        else:
+            ranked = [requested] + self.registry.get(requested).fallbacks
+
+        available = [name for name in ranked if self.is_available(name)]
+        return available + [name for name in ranked if name not in available]
+
+    async def _acquire(
+        self,
+        requested: str,
+        name: str,
+        next_name: Optional[str],
+        slots: int = 1
+    ) -> Optional[Callable[[], None]]:
+        """Take ``name``'s in-flight slots, or return None when it is busy and ``next_name`` can serve instead."""
+        if self.admission is None:
+            return lambda: None
+        try:
+            return await self.admission.acquire(name, slots, wait=next_name is None)
+        except AdmissionRejected as e:
+            if next_name is None:
+                raise
+            self._fall_back(requested, name, next_name, e.reason)
+            return None
+
+    def _record_error(self, name: str, error: UpstreamError) -> None:
+        if error.counts_as_failure or error.kind in FALLBACK_ERROR_KINDS:
+            self.health[name].record_failure()
+
+    def _fall_back(self, requested: str, name: str, next_name: str, reason: str) -> None:
+        MODEL_FALLBACKS.inc(requested=requested, from_model=name, to_model=next_name, reason=reason)
+        logging.info("Falling back from %s to %s (%s)", name, next_name, reason)
+
+    def _should_fall_back(self, requested: str, name: str, error: UpstreamError, next_name: Optional[str]) -> bool:
+        if next_name is None or error.kind not in FALLBACK_ERROR_KINDS:
+            return False
+        self._fall_back(requested, name, next_name, error.kind)
+        return True
+
+    async def generate_text(self, requested: str, request: TextGenerationRequest) -> TextGenerationResponse:
+        candidates = self.candidates(requested)
+        for index, name in enumerate(candidates):
+            next_name = candidates[index + 1] if index + 1 < len(candidates) else None
+            release = await self._acquire(requested, name, next_name)
+            if release is None:
+                continue
+            started = time.perf_counter()
+            try:
+                response = await self.services[name].generate_text(request, fail_fast=next_name is not None)
+            except UpstreamError as e:
+                self._record_error(name, e)
+                if self._should_fall_back(requested, name, e, next_name):
+                    continue
+                raise
+            finally:
+                release()
+            # A cache hit says nothing about how fast the model is
+            self.health[name].record_success(None if response.cached else time.perf_counter() - started)
+            MODEL_ROUTED.inc(requested=requested, model=name)
+            return replace(response, model=name)
+
+    async def stream_text(self, requested: str, request: TextGenerationRequest) -> AsyncIterator[TextGenerationChunk]:
+        """Stream from the first candidate that starts; once tokens flow there is no fallback."""
+        candidates = self.candidates(requested, stream=True)
+        for index, name in enumerate(candidates):
+            next_name = candidates[index + 1] if index + 1 < len(candidates) else None
+            release = await self._acquire(requested, name, next_name)
+            if release is None:
+                continue
+            chunks = self.services[name].stream_text(request)
+            try:
+                started = time.perf_counter()
+                try:
+                    first = await chunks.__anext__()
+                except StopAsyncIteration:
+                    return
+                except UpstreamError as e:
+                    self._record_error(name, e)
+                    if self._should_fall_back(requested, name, e, next_name):
+                        continue
+                    raise
+
+                self.health[name].record_success(first_token_seconds=time.perf_counter() - started)
+                MODEL_ROUTED.inc(requested=requested, model=name)
+                yield replace(first, model=name)
+                async for chunk in chunks:
+                    yield replace(chunk, model=name)
+                return
+            finally:
+                await chunks.aclose()
+                release()
+
+    async def generate_batch(
+        self,
+        requested: str,
+        requests: List[TextGenerationRequest],
+        max_concurrency: int
+    ) -> AsyncIterator[BatchItemResult]:
+        """
+        Send the whole batch to the best candidate, holding one of its slots per
+        concurrent upstream call; items report their own errors.
+        """
+        name = self.candidates(requested)[0]
+        release = await self._acquire(requested, name, None, slots=max_concurrency)
+        MODEL_ROUTED.inc(len(requests), requested=requested, model=name)
+        results = self.services[name].generate_batch(requests, max_concurrency)
+        try:
+            async for result in results:
+                if result.response is not None:
+                    result = replace(result, response=replace(result.response, model=name))
+                yield result
+        finally:
+            await results.aclose()
+            release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "ewma_latency": health.latency,
+                "ewma_first_token_latency": health.first_token_latency,
+                "error_rate": health.error_rate,
+                "samples": health.samples,
+                "score": self.score(name),
+                "stream_score": self.score(name, stream=True),
+                "weight": self.registry.get(name).weight,
+                "available": self.is_available(name)
+            }
+            for name, health in self.health.items()
+        }
+
+class RoutedModel(TextGenerationRepository):
+    """A model name as requested by the client (a registry entry or ``auto``), served through the router."""
+
+    def __init__(self, router: ModelRouter, requested: str):
+        self.router = router
+        self.requested = requested
+
+    async def generate_text(self, request: TextGenerationRequest) -> TextGenerationResponse:
+        return await self.router.generate_text(self.requested, request)
+
+    def stream_text(self, request: TextGenerationRequest) -> AsyncIterator[TextGenerationChunk]:
+        return self.router.stream_text(self.requested, request)
+
+    def generate_batch(
+        self,
+        requests: List[TextGenerationRequest],
+        max_concurrency: int
+    ) -> AsyncIterator[BatchItemResult]:
+        return self.router.generate_batch(self.requested, requests, max_concurrency)
@@ -1,18 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.security import HTTPBearer
 from app.presentation.api.routes import router
 from app.core.config import Settings
+from app.core.container import ServiceContainer
+from app.core.metrics import REGISTRY
+from app.core.logging_config import configure_logging
+from app.presentation.middleware.metrics import MetricsMiddleware
+from app.presentation.middleware.request_context import RequestContextMiddleware
+from contextlib import asynccontextmanager
 import uvicorn
 from dotenv import load_dotenv
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 security_scheme = {
     "type": "http",
     "scheme": "bearer",
@@ -20,7 +21,25 @@ security_scheme = {
     "description": "Enter your Bearer token in the format: Bearer <token>"
 }
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Validate environment variables and initialize services once per worker
+    settings.validate()
+    container = ServiceContainer(settings)
+    await container.startup()
+    app.state.container = container
+    REGISTRY.register_collector(container.collect_metrics)
+    await container.warm_up()
+    logging.info("Application started successfully")
+    try:
+        yield
+    finally:
+        REGISTRY.unregister_collector(container.collect_metrics)
+        await container.shutdown()
+        logging.info("Application shut down")
+
 app = FastAPI(
+    lifespan=lifespan,
     title="AI Service API",
     description="""
     AI Service API provides text generation capabilities using various language models.
@@ -47,6 +66,10 @@ app = FastAPI(
         {
             "name": "text-generation",
             "description": "Text generation using different AI models"
+        },
+        {
+            "name": "monitoring",
+            "description": "Operational statistics"
         }
     ]
 )
@@ -61,6 +84,9 @@ app.swagger_ui_init_oauth = {
 # Load settings
 settings = Settings()
 
+# Structured logging through a background writer thread
+configure_logging(settings)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -70,26 +96,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request metrics
+app.add_middleware(MetricsMiddleware)
+
+# Request IDs for log records; added last so it wraps everything else
+app.add_middleware(RequestContextMiddleware)
+
 # Include routes
 app.include_router(router, prefix="/api/v1")
 
-@app.on_event("startup")
-async def startup_event():
-    # Validate environment variables and initialize services
-    settings.validate()
-    logging.info("Application started successfully")
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    """The worker's event loop is responsive."""
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness(request: Request):
+    """Ready once this worker's services are started and warmed, and until it starts draining."""
+    container = getattr(request.app.state, "container", None)
+    if container is None:
+        return JSONResponse({"ready": False, "checks": {"started": False}}, status_code=503)
+    readiness = container.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
 
 def start():
-    """Launched with `python3 app/main.py`"""
+    """Launched with `python3 main.py`; SERVER_MODE selects the development or production server."""
     load_dotenv()  # Add this line to load .env file
     logging.info("Environment variables loaded")
-    uvicorn.run(
-        "app.main:app",
-        host="localhost",
-        port=8083,
-        reload=True,
-        log_level="info"
-    )
+    mode = settings.SERVER_MODE.lower()
+    if mode == "production":
+        # Imported lazily: gunicorn is not available on Windows development machines
+        from app.core.server import serve_production
+        serve_production(settings)
+    elif mode == "development":
+        uvicorn.run(
+            "app.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        raise ValueError(f"Unknown SERVER_MODE: {settings.SERVER_MODE}")
 
 if __name__ == "__main__":
     start()
@@ -1,38 +1,70 @@
-from fastapi import APIRouter, HTTPException, Depends, Header, Security
+from fastapi import APIRouter, HTTPException, Depends, Header, Security, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.presentation.schemas.requests import TokenVerifyRequest, TextGenerationRequest
-from app.presentation.schemas.responses import UserResponse, TextGenerationResponse
-from app.domain.entities.auth import TokenVerification
-from app.domain.entities.text_generation import TextGenerationRequest as DomainTextGenerationRequest
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
+from app.presentation.schemas.requests import TokenVerifyRequest, TextGenerationRequest, BatchTextGenerationRequest
+from app.presentation.schemas.responses import (
+    UserResponse, TextGenerationResponse, BatchItemResponse, BatchTextGenerationResponse, TokenUsageResponse
+)
+from app.domain.entities.auth import TokenVerification, User
+from app.domain.entities.text_generation import (
+    TextGenerationRequest as DomainTextGenerationRequest, TextGenerationChunk, BatchItemResult, TokenUsage
+)
 from app.domain.usecases.verify_auth import VerifyTokenUseCase, GetUserUseCase
 from app.domain.usecases.generate_text import GenerateTextUseCase
 from app.infrastructure.external.firebase_service import FirebaseService
-from app.infrastructure.external.huggingface_service import HuggingFaceService
-from typing import Annotated, Optional
+from app.infrastructure.external.http_client_pool import HttpClientPool
+from app.core.container import ServiceContainer
+from app.core.resilience import UpstreamError
+from app.core.metrics import observe_stage
+from app.core.admission import AdmissionRejected
+from app.core.token_budget import PromptTooLongError
+from app.core.model_registry import AUTO_MODEL
+from typing import Annotated, Optional, AsyncIterator, Dict, Any, List
+from dataclasses import asdict
+import json
 import logging
+import math
 
 router = APIRouter()
 security = HTTPBearer()
 
 # Dependencies
-def get_auth_service():
-    try:
-        return FirebaseService()
-    except Exception as e:
-        logging.error("Error creating FirebaseService: %s", str(e))
-        raise
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
+
+def get_auth_service(container: Annotated[ServiceContainer, Depends(get_container)]) -> FirebaseService:
+    return container.auth_service
 
-def get_text_generation_service(model_name: str = "mistral"):
-    return HuggingFaceService(model_name=model_name)
+def get_http_client_pool(container: Annotated[ServiceContainer, Depends(get_container)]) -> HttpClientPool:
+    return container.http_client_pool
 
-def get_verify_token_usecase(auth_service: Annotated[FirebaseService, Depends(get_auth_service)]):
-    return VerifyTokenUseCase(auth_service)
+def get_verify_token_usecase(container: Annotated[ServiceContainer, Depends(get_container)]) -> VerifyTokenUseCase:
+    return container.verify_token_usecase
 
-def get_user_usecase(auth_service: Annotated[FirebaseService, Depends(get_auth_service)]):
-    return GetUserUseCase(auth_service)
+def get_user_usecase(container: Annotated[ServiceContainer, Depends(get_container)]) -> GetUserUseCase:
+    return container.get_user_usecase
 
 def get_text_generation_usecase(model_name: str):
-    return GenerateTextUseCase(get_text_generation_service(model_name))
+    def dependency(
+        request: Request,
+        container: Annotated[ServiceContainer, Depends(get_container)]
+    ) -> GenerateTextUseCase:
+        request.state.model = model_name
+        return container.text_generation_usecase(model_name)
+    return dependency
+
+def get_requested_text_generation_usecase(
+    model: str,
+    request: Request,
+    container: Annotated[ServiceContainer, Depends(get_container)]
+) -> GenerateTextUseCase:
+    try:
+        usecase = container.text_generation_usecase(model)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    request.state.model = model
+    return usecase
 
 # Auth dependency
 async def verify_token_header(
@@ -70,7 +102,7 @@ async def verify_token(
     try:
         logging.info("Verifying token...")
         user = await usecase.execute(TokenVerification(id_token=request.id_token))
-        logging.info("Token verified successfully for user: %s", user.email)
+        logging.info("Token verified successfully for user: %s", user.uid)
         return UserResponse(
             uid=user.uid,
             email=user.email,
@@ -107,51 +139,336 @@ async def get_user(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Model-specific endpoints
-@router.post("/mistral", response_model=TextGenerationResponse, tags=["text-generation"])
-async def generate_with_mistral(
-    request: TextGenerationRequest,
-    user: Annotated[UserResponse, Security(security)],
-    usecase: Annotated[GenerateTextUseCase, Depends(lambda: get_text_generation_usecase("mistral"))]
-):
+# Upstream failures the client should retry later are surfaced as 503 with Retry-After
+TEMPORARY_UPSTREAM_ERRORS = {"circuit_open", "model_loading", "rate_limited"}
+
+def upstream_http_exception(error: UpstreamError) -> HTTPException:
+    if error.kind not in TEMPORARY_UPSTREAM_ERRORS:
+        return HTTPException(status_code=500, detail=str(error))
+    headers = None
+    if error.retry_after is not None:
+        headers = {"Retry-After": str(math.ceil(error.retry_after))}
+    return HTTPException(status_code=503, detail=str(error), headers=headers)
+
+def admission_http_exception(error: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(max(math.ceil(error.retry_after), 1))}
+    )
+
+def usage_response(usage: Optional[TokenUsage]) -> Optional[TokenUsageResponse]:
+    return TokenUsageResponse(**asdict(usage)) if usage is not None else None
+
+async def admit_generation(
+    container: ServiceContainer,
+    user: User,
+    model_name: str,
+    parameters_list: List[Optional[Dict[str, Any]]]
+) -> None:
     """
-    Generate text using the Mistral model.
-    
-    This endpoint requires authentication using a Bearer token.
-    You can control the generation using parameters like max_new_tokens and temperature.
+    Every item counts against the user's limits. Items without ``max_new_tokens`` are
+    charged the default of the model the router would serve them with (``auto``
+    resolves to its current first choice). Model slots are taken by the router for
+    whichever model ends up serving the request.
     """
+    serving_model = container.model_registry.get(container.model_router.candidates(model_name)[0])
+    tokens = sum(serving_model.max_new_tokens(parameters) for parameters in parameters_list)
+    try:
+        await container.admission_controller.charge(user.uid, model_name, tokens, items=len(parameters_list))
+    except AdmissionRejected as e:
+        raise admission_http_exception(e)
+
+def generation_http_exception(error: Exception) -> HTTPException:
+    if isinstance(error, PromptTooLongError):
+        return HTTPException(status_code=413, detail=str(error))
+    if isinstance(error, AdmissionRejected):
+        return admission_http_exception(error)
+    if isinstance(error, UpstreamError):
+        return upstream_http_exception(error)
+    return HTTPException(status_code=500, detail=str(error))
+
+# Streaming helpers
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def format_chunk(chunk: TextGenerationChunk) -> Optional[str]:
+    if chunk.generated_text is not None:
+        return format_sse({
+            "generated_text": chunk.generated_text,
+            "detected_language": chunk.detected_language,
+            "model": chunk.model,
+            "usage": asdict(chunk.usage) if chunk.usage is not None else None
+        }, event="end")
+    if chunk.token:
+        return format_sse({"token": chunk.token})
+    return None
+
+async def stream_generation(
+    first: Optional[TextGenerationChunk],
+    chunks: AsyncIterator[TextGenerationChunk],
+    http_request: Request
+) -> AsyncIterator[str]:
     try:
-        domain_request = DomainTextGenerationRequest(
-            inputs=request.inputs,
-            parameters=request.parameters
+        if first is None:
+            return
+        message = format_chunk(first)
+        if message:
+            yield message
+        async for chunk in chunks:
+            if await http_request.is_disconnected():
+                logging.info("Client disconnected, cancelling upstream generation")
+                break
+            message = format_chunk(chunk)
+            if message:
+                yield message
+    except Exception as e:
+        # Headers are already sent, so errors after the first token are reported in the stream
+        logging.error("Error while streaming generation: %s", str(e))
+        yield format_sse({"detail": str(e)}, event="error")
+    finally:
+        await chunks.aclose()
+
+async def run_generation(
+    container: ServiceContainer,
+    usecase: GenerateTextUseCase,
+    request: TextGenerationRequest,
+    http_request: Request,
+    user: User,
+    stream: bool
+):
+    domain_request = DomainTextGenerationRequest(
+        inputs=request.inputs,
+        parameters=request.parameters
+    )
+    await admit_generation(container, user, http_request.state.model, [request.parameters])
+    if stream:
+        chunks = usecase.stream(domain_request)
+        # Wait for the first token before sending headers, so an oversized prompt, a full
+        # model or an upstream that cannot start still gets its own status code
+        try:
+            first: Optional[TextGenerationChunk] = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except Exception as e:
+            raise generation_http_exception(e)
+        return StreamingResponse(
+            stream_generation(first, chunks, http_request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Closing is idempotent; the background task covers a body that never starts
+            background=BackgroundTask(chunks.aclose)
         )
+
+    try:
         result = await usecase.execute(domain_request)
-        return TextGenerationResponse(
-            generated_text=result.generated_text
-        )
+        with observe_stage("response_serialisation", http_request.state.model):
+            return JSONResponse(TextGenerationResponse(
+                generated_text=result.generated_text,
+                detected_language=result.detected_language,
+                model=result.model,
+                usage=usage_response(result.usage)
+            ).model_dump())
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise generation_http_exception(e)
 
-@router.post("/mixtral", response_model=TextGenerationResponse, tags=["text-generation"])
-async def generate_with_mixtral(
+@router.get("/models", tags=["text-generation"])
+async def list_models(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    List the configured models and whether each is currently available.
+
+    Any of these names, or `auto`, can be used with `/generate/{model}`.
+    """
+    routing = container.model_router.stats()
+    return {
+        "models": [
+            {
+                "name": model.name,
+                "context_window": model.context_window,
+                "weight": model.weight,
+                "fallbacks": model.fallbacks,
+                "available": routing[model.name]["available"]
+            }
+            for model in container.model_registry
+        ],
+        "auto": AUTO_MODEL
+    }
+
+@router.post("/generate/{model}", response_model=TextGenerationResponse, tags=["text-generation"])
+async def generate(
     request: TextGenerationRequest,
-    user: Annotated[UserResponse, Security(security)],
-    usecase: Annotated[GenerateTextUseCase, Depends(lambda: get_text_generation_usecase("mixtral"))]
+    user: Annotated[User, Depends(verify_token_header)],
+    usecase: Annotated[GenerateTextUseCase, Depends(get_requested_text_generation_usecase)],
+    container: Annotated[ServiceContainer, Depends(get_container)],
+    http_request: Request,
+    stream: bool = False
 ):
     """
-    Generate text using the Mixtral model.
-    
+    Generate text with a configured model, or with `auto` to use whichever model
+    currently has the best latency and error rate.
+
+    If the model is cold-loading or failing, the request falls back to the model's
+    configured fallbacks; the response names the model that served it.
     This endpoint requires authentication using a Bearer token.
-    You can control the generation using parameters like max_new_tokens and temperature.
+    Pass `stream=true` to receive tokens as Server-Sent Events while they are generated.
     """
-    try:
-        domain_request = DomainTextGenerationRequest(
-            inputs=request.inputs,
-            parameters=request.parameters
+    return await run_generation(container, usecase, request, http_request, user, stream)
+
+# Kept for existing clients; equivalent to /generate/mistral and /generate/mixtral
+@router.post("/mistral", response_model=TextGenerationResponse, tags=["text-generation"], deprecated=True)
+async def generate_with_mistral(
+    request: TextGenerationRequest,
+    user: Annotated[User, Depends(verify_token_header)],
+    usecase: Annotated[GenerateTextUseCase, Depends(get_text_generation_usecase("mistral"))],
+    container: Annotated[ServiceContainer, Depends(get_container)],
+    http_request: Request,
+    stream: bool = False
+):
+    """
+    Generate text using the Mistral model. Deprecated: use `/generate/mistral`.
+    """
+    return await run_generation(container, usecase, request, http_request, user, stream)
+
+@router.post("/mixtral", response_model=TextGenerationResponse, tags=["text-generation"], deprecated=True)
+async def generate_with_mixtral(
+    request: TextGenerationRequest,
+    user: Annotated[User, Depends(verify_token_header)],
+    usecase: Annotated[GenerateTextUseCase, Depends(get_text_generation_usecase("mixtral"))],
+    container: Annotated[ServiceContainer, Depends(get_container)],
+    http_request: Request,
+    stream: bool = False
+):
+    """
+    Generate text using the Mixtral model. Deprecated: use `/generate/mixtral`.
+    """
+    return await run_generation(container, usecase, request, http_request, user, stream)
+
+def to_batch_item_response(result: BatchItemResult) -> BatchItemResponse:
+    if result.response is None:
+        return BatchItemResponse(index=result.index, error=result.error)
+    return BatchItemResponse(
+        index=result.index,
+        generated_text=result.response.generated_text,
+        detected_language=result.response.detected_language,
+        model=result.response.model,
+        usage=usage_response(result.response.usage)
+    )
+
+@router.post("/{model}/batch", response_model=BatchTextGenerationResponse, tags=["text-generation"])
+async def generate_batch(
+    model: str,
+    request: BatchTextGenerationRequest,
+    user: Annotated[User, Depends(verify_token_header)],
+    usecase: Annotated[GenerateTextUseCase, Depends(get_requested_text_generation_usecase)],
+    container: Annotated[ServiceContainer, Depends(get_container)],
+    stream: bool = False
+):
+    """
+    Generate text for several inputs with one authenticated request.
+
+    Items are sent upstream concurrently, bounded by BATCH_MAX_CONCURRENCY, and each
+    item reports either its generated text or its own error.
+    Pass `stream=true` to receive results as NDJSON lines in completion order.
+    """
+    settings = container.settings
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch contains {len(request.items)} items, the maximum is {settings.BATCH_MAX_ITEMS}"
         )
-        result = await usecase.execute(domain_request)
-        return TextGenerationResponse(
-            generated_text=result.generated_text
+
+    domain_requests = [
+        DomainTextGenerationRequest(inputs=item.inputs, parameters=item.parameters)
+        for item in request.items
+    ]
+    # The fan-out never runs more than these upstream calls at once
+    concurrency = min(len(domain_requests), settings.BATCH_MAX_CONCURRENCY, settings.MODEL_MAX_IN_FLIGHT)
+    await admit_generation(container, user, model, [item.parameters for item in request.items])
+    # The router holds one of the serving model's slots per concurrent call until the batch is done
+    results = usecase.execute_batch(domain_requests, concurrency)
+
+    if stream:
+        # Wait for the first result before sending headers, so a model with no free
+        # slots is still reported as 429 rather than as a broken stream
+        try:
+            first: Optional[BatchItemResult] = await results.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except AdmissionRejected as e:
+            raise admission_http_exception(e)
+
+        async def ndjson_lines() -> AsyncIterator[str]:
+            try:
+                if first is not None:
+                    yield to_batch_item_response(first).model_dump_json() + "\n"
+                    async for result in results:
+                        yield to_batch_item_response(result).model_dump_json() + "\n"
+            finally:
+                await results.aclose()
+
+        return StreamingResponse(
+            ndjson_lines(),
+            media_type="application/x-ndjson",
+            # Closing is idempotent; the background task covers a body that never starts
+            background=BackgroundTask(results.aclose)
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        items = [to_batch_item_response(result) async for result in results]
+    except AdmissionRejected as e:
+        raise admission_http_exception(e)
+    items.sort(key=lambda item: item.index)
+    return BatchTextGenerationResponse(results=items)
+
+@router.get("/http-pool/stats", tags=["monitoring"])
+async def http_pool_stats(client_pool: Annotated[HttpClientPool, Depends(get_http_client_pool)]):
+    """
+    Report utilisation of the upstream HTTP client pools.
+
+    Use these numbers to size HTTP_MAX_CONNECTIONS and HTTP_MAX_KEEPALIVE_CONNECTIONS.
+    """
+    return client_pool.stats()
+
+@router.get("/auth-cache/stats", tags=["monitoring"])
+async def auth_cache_stats(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    Report hit/miss counters of the verified-token and user-profile caches.
+    """
+    return {
+        "tokens": container.firebase_token_verifier.stats(),
+        "users": container.firebase_user_cache.stats()
+    }
+
+@router.get("/generation-cache/stats", tags=["monitoring"])
+async def generation_cache_stats(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    Report generation cache hit rate and the upstream time saved by hits and coalescing.
+    """
+    if container.generation_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **container.generation_cache.stats()}
+
+@router.get("/resilience/stats", tags=["monitoring"])
+async def resilience_stats(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    Report retries, hedged requests, error classes and circuit breaker state per model.
+    """
+    return {
+        model_name: service.resilience_stats()
+        for model_name, service in container.text_generation_services.items()
+    }
+
+@router.get("/routing/stats", tags=["monitoring"])
+async def routing_stats(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    Report the EWMA latency, error rate and routing score of each model.
+    """
+    return container.model_router.stats()
+
+@router.get("/admission/stats", tags=["monitoring"])
+async def admission_stats(container: Annotated[ServiceContainer, Depends(get_container)]):
+    """
+    Report in-flight and queued generations per model.
+    """
+    return container.admission_controller.stats()
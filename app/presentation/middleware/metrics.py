@@ -0,0 +1,43 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import REQUESTS_TOTAL, REQUEST_DURATION, REQUESTS_IN_FLIGHT
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight gauges per route template and model.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so it adds no extra task
+    per request and does not buffer streaming responses.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path_format", None) or "unmatched"
+            # Generation dependencies record the model on request.state once it is validated;
+            # the raw path parameter is client controlled and would create unbounded series
+            state = scope.get("state") or {}
+            model = state.get("model") or ("unknown" if "model" in scope.get("path_params", {}) else "")
+            method = scope["method"]
+            REQUEST_DURATION.observe(time.perf_counter() - started, method=method, route=route_path, model=model)
+            REQUESTS_TOTAL.inc(method=method, route=route_path, model=model, status=str(status))
@@ -0,0 +1,61 @@
+import logging
+import re
+import time
+import uuid
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging_config import request_id_var
+
+# Client supplied IDs are kept only when they are short and log-safe
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+class RequestContextMiddleware:
+    """
+    Tags each request with an ID for its log records and logs one line when it completes.
+
+    An incoming ``X-Request-ID`` header is reused so IDs can be followed across
+    services; otherwise one is generated. The ID is echoed in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            logging.info(
+                "%s %s %d %.1fms", scope["method"], scope["path"], status, duration_ms,
+                extra={
+                    "method": scope["method"],
+                    "route": getattr(route, "path_format", None) or "unmatched",
+                    "status": status,
+                    "duration_ms": duration_ms
+                }
+            )
+            request_id_var.reset(token)
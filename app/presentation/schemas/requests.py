@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class TokenVerifyRequest(BaseModel):
     id_token: str
@@ -7,3 +7,6 @@ class TokenVerifyRequest(BaseModel):
 class TextGenerationRequest(BaseModel):
     inputs: str
     parameters: Optional[Dict[str, Any]] = None
+
+class BatchTextGenerationRequest(BaseModel):
+    items: List[TextGenerationRequest]
@@ -1,11 +1,30 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class UserResponse(BaseModel):
     uid: str
     email: Optional[str] = None
     display_name: Optional[str] = None
 
+class TokenUsageResponse(BaseModel):
+    prompt_tokens: int
+    max_new_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    truncated: bool = False
+
 class TextGenerationResponse(BaseModel):
     generated_text: str
     detected_language: Optional[str] = None
+    model: Optional[str] = None
+    usage: Optional[TokenUsageResponse] = None
+
+class BatchItemResponse(BaseModel):
+    index: int
+    generated_text: Optional[str] = None
+    detected_language: Optional[str] = None
+    model: Optional[str] = None
+    usage: Optional[TokenUsageResponse] = None
+    error: Optional[str] = None
+
+class BatchTextGenerationResponse(BaseModel):
+    results: List[BatchItemResponse]
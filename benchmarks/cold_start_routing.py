@@ -0,0 +1,120 @@
+"""
+Tail latency of generations while one model is cold-loading.
+
+Runs ``benchmarks.mock_upstream`` and, for each routing strategy, starts a fresh
+cold start of Mistral on it, then sends generations through the service
+container's use cases at a fixed concurrency:
+
+- ``mistral-no-fallback``: Mistral alone, so requests wait out the cold start
+- ``mistral-fallback``: Mistral with Mixtral as its fallback
+- ``auto``: latency-aware routing across both models
+
+    python -m benchmarks.cold_start_routing --cold-seconds 8 --duration 12 --concurrency 8
+"""
+import argparse
+import asyncio
+import copy
+import subprocess
+import sys
+import time
+from typing import Dict, List
+import httpx
+from benchmarks.dependency_overhead import _configure_fake_credentials
+from benchmarks.load_test import _percentile, _wait_until_ready
+
+STRATEGIES = ("mistral-no-fallback", "mistral-fallback", "auto")
+
+async def _run_strategy(strategy: str, args: argparse.Namespace, upstream_url: str) -> Dict[str, float]:
+    from app.core.config import Settings, DEFAULT_MODEL_REGISTRY
+    from app.core.container import ServiceContainer
+    from app.domain.entities.text_generation import TextGenerationRequest
+
+    registry = copy.deepcopy(DEFAULT_MODEL_REGISTRY)
+    if strategy == "mistral-no-fallback":
+        registry["mistral"]["fallbacks"] = []
+    settings = Settings(
+        HUGGINGFACE_API_BASE_URL=f"{upstream_url}/models",
+        MODEL_REGISTRY=registry,
+        GENERATION_CACHE_BACKEND="none",
+        ROUTING_EXPLORATION_RATE=0.0
+    )
+    container = ServiceContainer(settings)
+    usecase = container.text_generation_usecase("auto" if strategy == "auto" else "mistral")
+
+    async with httpx.AsyncClient() as client:
+        await client.post(
+            f"{upstream_url}/control/cold-start",
+            json={"model": "Mistral-7B", "seconds": args.cold_seconds}
+        )
+
+    latencies: List[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        n = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                await usecase.execute(TextGenerationRequest(inputs=f"Request {worker_id}-{n}: explain caching."))
+                latencies.append(time.perf_counter() - started)
+            except ValueError:
+                errors += 1
+            n += 1
+
+    try:
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    finally:
+        await container.http_client_pool.aclose()
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0
+    }
+
+async def _run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    mock = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.mock_upstream", "--port", str(args.upstream_port),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", "0.3"
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        await _wait_until_ready(f"{upstream_url}/stats")
+        return {strategy: await _run_strategy(strategy, args, upstream_url) for strategy in args.strategies}
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cold-seconds", type=float, default=8.0)
+    parser.add_argument("--duration", type=float, default=12.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--upstream-port", type=int, default=8091)
+    parser.add_argument("--strategies", type=lambda s: s.split(","), default=list(STRATEGIES))
+    args = parser.parse_args()
+
+    _configure_fake_credentials()
+    results = asyncio.run(_run(args))
+
+    print(f"\n{'strategy':<22}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for strategy, row in results.items():
+        print(
+            f"{strategy:<22}{row['requests']:>10}{row['errors']:>8}{row['p50_ms']:>10}"
+            f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Microbenchmark of per-request dependency wiring.
+
+Compares building the auth and text generation services for every request
+(the pre-container wiring) with resolving them from the shared ServiceContainer.
+
+    python -m benchmarks.dependency_overhead --iterations 2000 --max-overhead-us 50
+
+Exits non-zero when the container path costs more than ``--max-overhead-us``
+per request, so it can guard against regressions in CI.
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+def _configure_fake_credentials() -> None:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode()
+    os.environ.setdefault("HUGGINGFACE_TOKEN", "benchmark-token")
+    os.environ.setdefault("FIREBASE_PROJECT_ID", "benchmark-project")
+    os.environ.setdefault("FIREBASE_PRIVATE_KEY_ID", "benchmark-key-id")
+    os.environ.setdefault("FIREBASE_PRIVATE_KEY", pem)
+    os.environ.setdefault("FIREBASE_CLIENT_EMAIL", "benchmark@benchmark-project.iam.gserviceaccount.com")
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--max-overhead-us", type=float, default=None)
+    args = parser.parse_args()
+
+    _configure_fake_credentials()
+
+    from app.core.config import Settings
+    from app.core.container import ServiceContainer
+    from app.domain.usecases.verify_auth import VerifyTokenUseCase
+    from app.domain.usecases.generate_text import GenerateTextUseCase
+    from app.infrastructure.external.firebase_service import FirebaseService
+    from app.infrastructure.external.huggingface_service import HuggingFaceService
+    from app.presentation.api import routes
+
+    container = ServiceContainer(Settings())
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(container=container)),
+        state=SimpleNamespace()
+    )
+    resolve_generation = routes.get_text_generation_usecase("mistral")
+
+    def per_request_construction():
+        auth_service = FirebaseService(
+            firebase_credentials=container.settings.get_firebase_credentials(),
+            token_verifier=container.firebase_token_verifier,
+            user_cache=container.firebase_user_cache
+        )
+        VerifyTokenUseCase(auth_service)
+        GenerateTextUseCase(HuggingFaceService(
+            container.http_client_pool,
+            model=container.model_registry.get("mistral")
+        ))
+
+    def container_lookup():
+        resolved = routes.get_container(request)
+        routes.get_verify_token_usecase(resolved)
+        resolve_generation(request, resolved)
+
+    before = _time_per_call(per_request_construction, args.iterations)
+    after = _time_per_call(container_lookup, args.iterations)
+
+    print(f"per-request construction: {before:10.2f} us/request")
+    print(f"container lookup:         {after:10.2f} us/request")
+    print(f"speedup:                  {before / after:10.1f}x")
+
+    if args.max_overhead_us is not None and after > args.max_overhead_us:
+        print(f"Regression: container lookup exceeds {args.max_overhead_us} us/request", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
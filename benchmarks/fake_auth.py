@@ -0,0 +1,26 @@
+"""
+In-process AuthRepository for load tests.
+
+Accepts any token of the form ``bench-<uid>`` so benchmark traffic exercises the
+routes and dependency wiring without calling Firebase.
+"""
+import asyncio
+from app.domain.entities.auth import User, TokenVerification
+from app.domain.repositories.auth_repository import AuthRepository
+
+TOKEN_PREFIX = "bench-"
+
+class FakeAuthRepository(AuthRepository):
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def verify_token(self, token_verification: TokenVerification) -> User:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        token = token_verification.id_token
+        if not token.startswith(TOKEN_PREFIX):
+            raise ValueError("Invalid benchmark token")
+        return await self.get_user(token[len(TOKEN_PREFIX):])
+
+    async def get_user(self, uid: str) -> User:
+        return User(uid=uid, email=f"{uid}@benchmark.local", display_name=uid)
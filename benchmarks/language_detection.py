@@ -0,0 +1,154 @@
+"""
+Accuracy and latency of the n-gram detector against the previous langdetect path.
+
+    python -m benchmarks.language_detection --repeat 20
+
+The corpus mixes one-word greetings, short chat-style prompts and longer
+paragraphs in the five languages we have system prompts for, each labelled with
+its real language. Both detectors fall back to English when they cannot tell;
+a fallback counts towards accuracy only when the text really is English, and is
+reported on its own next to confident wrong answers. Latency for the new detector
+is reported both cold (memo cache cleared) and warm (every input already cached).
+"""
+from typing import Callable, Dict, Optional
+import argparse
+import statistics
+import time
+from langdetect import detect
+from app.core.language_detector import DEFAULT_LANGUAGE, SYSTEM_PROMPTS, load_detector
+
+CORPUS = [
+    # Greetings and one-word prompts: too little signal for a confident answer, so the
+    # detector may fall back to the default language, but it should not guess wrong
+    ("en", "hi"),
+    ("en", "Hi!"),
+    ("en", "ok"),
+    ("en", "code"),
+    ("en", "thanks"),
+    ("en", "How are you?"),
+    ("en", "Thank you"),
+    ("de", "Hallo"),
+    ("de", "Danke"),
+    ("de", "Danke schön!"),
+    ("de", "Guten Morgen"),
+    ("de", "Wie spät ist es?"),
+    ("de", "Hilf mir bitte"),
+    ("es", "Hola"),
+    ("es", "Buenos días"),
+    ("es", "¿Qué hora es?"),
+    ("es", "¿Qué es esto?"),
+    ("es", "Hola, ¿qué tal?"),
+    ("es", "Muchas gracias"),
+    ("fr", "Merci"),
+    ("fr", "Merci beaucoup"),
+    ("fr", "Bonjour, ça va?"),
+    ("fr", "Quelle heure est-il ?"),
+    ("fr", "Salut"),
+    ("tr", "Merhaba"),
+    ("tr", "Merhaba, nasılsın?"),
+    ("tr", "Günaydın"),
+    ("tr", "Bu ne?"),
+    ("tr", "Evet lütfen"),
+    ("tr", "Yapay zeka nedir?"),
+    ("tr", "Bana Python ile bir web sunucusu nasıl yazılır anlatır mısın?"),
+    ("tr", "Bu hafta sonu İstanbul'da hava nasıl olacak, dışarı çıkmak için uygun mu?"),
+    ("tr", "Şirketimizin yıllık raporunu özetleyen kısa bir e-posta taslağı hazırla."),
+    ("tr", "Makine öğrenmesi modelleri büyük veri kümeleri üzerinde eğitilir ve bu süreçte "
+           "örüntüleri öğrenerek yeni veriler hakkında tahminlerde bulunurlar."),
+    ("en", "What is artificial intelligence?"),
+    ("en", "Can you explain how to write a web server in Python?"),
+    ("en", "Summarise the quarterly report in three short bullet points for the board."),
+    ("en", "Write a polite email declining the meeting invitation for next Tuesday."),
+    ("en", "Machine learning models are trained on large datasets and learn patterns that "
+           "allow them to make predictions about data they have never seen before."),
+    ("de", "Was ist künstliche Intelligenz?"),
+    ("de", "Kannst du mir erklären, wie man einen Webserver in Python schreibt?"),
+    ("de", "Fasse den Quartalsbericht in drei kurzen Stichpunkten für den Vorstand zusammen."),
+    ("de", "Schreibe eine höfliche E-Mail, in der ich die Einladung zum Treffen absage."),
+    ("de", "Modelle des maschinellen Lernens werden mit großen Datensätzen trainiert und lernen "
+           "Muster, mit denen sie Vorhersagen über unbekannte Daten treffen können."),
+    ("es", "¿Qué es la inteligencia artificial?"),
+    ("es", "¿Puedes explicarme cómo escribir un servidor web en Python?"),
+    ("es", "Resume el informe trimestral en tres puntos breves para la junta directiva."),
+    ("es", "Escribe un correo educado rechazando la invitación a la reunión del martes."),
+    ("es", "Los modelos de aprendizaje automático se entrenan con grandes conjuntos de datos y "
+           "aprenden patrones que les permiten hacer predicciones sobre datos nuevos."),
+    ("fr", "Qu'est-ce que l'intelligence artificielle ?"),
+    ("fr", "Peux-tu m'expliquer comment écrire un serveur web en Python ?"),
+    ("fr", "Résume le rapport trimestriel en trois points courts pour le conseil."),
+    ("fr", "Rédige un courriel poli pour décliner l'invitation à la réunion de mardi."),
+    ("fr", "Les modèles d'apprentissage automatique sont entraînés sur de grands ensembles de "
+           "données et apprennent des motifs qui leur permettent de faire des prédictions."),
+]
+
+def langdetect_path(text: str) -> Optional[str]:
+    """The detection path used before the n-gram detector; None where it fell back to English."""
+    try:
+        lang = detect(text)
+        return lang if lang in SYSTEM_PROMPTS else None
+    except Exception:
+        return None
+
+def measure(
+    fn: Callable[[str], Optional[str]],
+    repeat: int,
+    classify: Optional[Callable[[str], Optional[str]]] = None
+) -> Dict[str, float]:
+    """Time ``fn``; ``classify``, if given, tells its fallbacks apart from real answers, untimed."""
+    correct = fallbacks = wrong = 0
+    timings = []
+    for _ in range(repeat):
+        for expected, text in CORPUS:
+            start = time.perf_counter()
+            detected = fn(text)
+            timings.append((time.perf_counter() - start) * 1e6)
+            if classify is not None:
+                detected = classify(text)
+            if detected is None:
+                fallbacks += 1
+                correct += expected == DEFAULT_LANGUAGE
+            else:
+                correct += detected == expected
+                wrong += detected != expected
+    timings.sort()
+    samples = len(CORPUS) * repeat
+    return {
+        "accuracy": correct / samples,
+        "fallback": fallbacks / samples,
+        "wrong": wrong / samples,
+        "mean_us": statistics.mean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[int(len(timings) * 0.99) - 1]
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    detector = load_detector()
+    print(f"profile load: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    # Warm langdetect's own lazy profile loading so it is not billed to the first sample
+    langdetect_path("warm up")
+
+    def cold(text: str) -> str:
+        detector.cache.clear()
+        return detector.detect(text)
+
+    results = {
+        "langdetect": measure(langdetect_path, args.repeat),
+        "ngram (cold)": measure(cold, args.repeat, detector.classify),
+        "ngram (warm)": measure(detector.detect, args.repeat, detector.classify)
+    }
+
+    print(f"{'detector':<14} {'accuracy':>9} {'fallback':>9} {'wrong':>9} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['accuracy']:>9.1%} {result['fallback']:>9.1%} {result['wrong']:>9.1%} "
+            f"{result['mean_us']:>10.1f} {result['p50_us']:>10.1f} {result['p99_us']:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+End-to-end load test of the API against local stand-ins for Hugging Face and Firebase.
+
+Starts ``benchmarks.mock_upstream`` and ``uvicorn benchmarks.serve:app`` as
+subprocesses, drives the selected scenarios at a fixed concurrency and reports
+throughput, latency percentiles, and event-loop lag and memory per worker.
+
+    python -m benchmarks.load_test --workers 2 --concurrency 32 --duration 20
+    python -m benchmarks.load_test --save-baseline default
+    python -m benchmarks.load_test --compare default --tolerance 0.15
+
+Baselines are stored in ``benchmarks/baselines/<name>.json``. ``--compare`` exits
+non-zero when throughput drops or p95/p99 latency grows by more than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+PROMPTS = [
+    "Explain how a hash map handles collisions.",
+    "Bir hash tablosunda çakışmalar nasıl çözülür?",
+    "Write a short poem about the sea.",
+    "Deniz hakkında kısa bir şiir yaz.",
+    "Summarise the benefits of connection pooling in two sentences."
+]
+
+SCENARIOS = ("mistral", "mixtral", "mistral-stream", "verify-token", "auto")
+DEFAULT_SCENARIOS = ("mistral", "mixtral", "mistral-stream", "verify-token")
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+async def _wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+async def _call(client: httpx.AsyncClient, scenario: str, n: int) -> int:
+    uid = f"user-{n % 100}"
+    headers = {"Authorization": f"Bearer bench-{uid}"}
+    body = {"inputs": PROMPTS[n % len(PROMPTS)] + f" #{n}"}
+
+    if scenario == "verify-token":
+        response = await client.post("/api/v1/verify-token", json={"id_token": f"bench-{uid}"})
+        return response.status_code
+    if scenario == "mistral-stream":
+        async with client.stream("POST", "/api/v1/generate/mistral", params={"stream": "true"}, json=body, headers=headers) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+    response = await client.post(f"/api/v1/generate/{scenario}", json=body, headers=headers)
+    return response.status_code
+
+async def _drive(
+    base_url: str,
+    scenarios: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> Tuple[Dict[str, List[float]], Dict[str, Dict[str, int]], float]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    counter = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        stop_at = measure_from + duration
+
+        async def user() -> None:
+            nonlocal counter
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                n = counter
+                counter += 1
+                scenario = scenarios[n % len(scenarios)]
+                try:
+                    status = str(await _call(client, scenario, n))
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if now >= measure_from:
+                    latencies[scenario].append(time.perf_counter() - now)
+                    statuses[scenario][status] += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, statuses, duration
+
+def _parse_metrics(text: str) -> Dict[str, List[Tuple[str, float]]]:
+    samples: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, _, value = line.rpartition(" ")
+        name, _, labels = series.partition("{")
+        samples[name].append((labels.rstrip("}"), float(value)))
+    return samples
+
+async def _scrape_workers(base_url: str, workers: int, attempts: int = 50) -> Dict[str, Dict[str, float]]:
+    """Scrape /metrics until every worker has answered; each scrape lands on one worker."""
+    per_worker: Dict[str, Dict[str, float]] = {}
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(attempts):
+            samples = _parse_metrics((await client.get("/metrics")).text)
+            rss = samples.get("ai_service_process_resident_memory_bytes") or samples.get(
+                "ai_service_process_max_resident_memory_bytes", []
+            )
+            if not rss:
+                break
+            pid = rss[0][0].split('"')[1]
+            lag_sum = sum(v for _, v in samples.get("ai_service_event_loop_lag_seconds_sum", []))
+            lag_count = sum(v for _, v in samples.get("ai_service_event_loop_lag_seconds_count", []))
+            max_lag = samples.get("ai_service_event_loop_max_lag_seconds", [("", 0.0)])[0][1]
+            per_worker[pid] = {
+                "rss_mb": round(rss[0][1] / 2 ** 20, 1),
+                "event_loop_lag_mean_ms": round(lag_sum / lag_count * 1000, 2) if lag_count else 0.0,
+                "event_loop_lag_max_ms": round(max_lag * 1000, 2)
+            }
+            if len(per_worker) >= workers:
+                break
+            # Closing the connection makes the next scrape more likely to reach another worker
+            client.headers["Connection"] = "close"
+    return per_worker
+
+def _summarise(latencies: Dict[str, List[float]], statuses: Dict[str, Dict[str, int]], duration: float) -> Dict[str, Any]:
+    summary = {}
+    for scenario, values in latencies.items():
+        ordered = sorted(values)
+        errors = sum(count for status, count in statuses[scenario].items() if not status.startswith("2"))
+        summary[scenario] = {
+            "requests": len(ordered),
+            "rps": round(len(ordered) / duration, 1),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+            "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+            "statuses": dict(statuses[scenario])
+        }
+    return summary
+
+def _compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'scenario':<16}{'metric':<12}{'baseline':>12}{'current':>12}{'change':>10}")
+    for scenario, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(scenario)
+        if now is None:
+            regressions.append(f"{scenario}: missing from this run")
+            continue
+        for metric, higher_is_better in (("rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)):
+            change = (now[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+            print(f"{scenario:<16}{metric:<12}{base[metric]:>12}{now[metric]:>12}{change:>+10.1%}")
+            if metric == "p50_ms":
+                continue
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{scenario}: {metric} {base[metric]} -> {now[metric]} ({change:+.1%})")
+        if now["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{scenario}: error rate {base['error_rate']} -> {now['error_rate']}")
+    return regressions
+
+def _start(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", *args],
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    base_url = f"http://127.0.0.1:{args.port}"
+    processes = [
+        _start([
+            "benchmarks.mock_upstream", "--port", str(args.upstream_port),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+            "--loading-rate", str(args.loading_rate), "--estimated-time", "0.2",
+            "--token-delay-ms", str(args.token_delay_ms)
+        ])
+    ]
+    try:
+        await _wait_until_ready(f"{upstream_url}/stats")
+        processes.append(_start(
+            [
+                "uvicorn", "benchmarks.serve:app", "--port", str(args.port),
+                "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+            ],
+            env={"BENCHMARK_UPSTREAM_URL": upstream_url}
+        ))
+        await _wait_until_ready(f"{base_url}/metrics")
+
+        latencies, statuses, duration = await _drive(
+            base_url, args.scenarios, args.concurrency, args.duration, args.warmup
+        )
+        workers = await _scrape_workers(base_url, args.workers)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "config": {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "scenarios": args.scenarios,
+            "upstream_latency_ms": args.latency_ms,
+            "upstream_latency_sigma": args.latency_sigma,
+            "loading_rate": args.loading_rate,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count()
+        },
+        "scenarios": _summarise(latencies, statuses, duration),
+        "workers": workers
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(DEFAULT_SCENARIOS),
+                        help=f"comma separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--upstream-port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="median mock upstream latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--loading-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=5.0)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    result = asyncio.run(_run(args))
+
+    print(f"\n{'scenario':<16}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    for scenario, row in result["scenarios"].items():
+        print(
+            f"{scenario:<16}{row['requests']:>10}{row['rps']:>10}{row['p50_ms']:>10}"
+            f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>10.2%}"
+        )
+    print(f"\n{'worker pid':<12}{'rss MB':>10}{'loop lag mean ms':>18}{'loop lag max ms':>18}")
+    for pid, row in result["workers"].items():
+        print(f"{pid:<12}{row['rss_mb']:>10}{row['event_loop_lag_mean_ms']:>18}{row['event_loop_lag_max_ms']:>18}")
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"\nSaved baseline to {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if baseline["config"]["workers"] != args.workers or baseline["config"]["concurrency"] != args.concurrency:
+            print("\nWarning: baseline was recorded with a different worker count or concurrency")
+        regressions = _compare(result, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions beyond tolerance")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Per-request logging cost on the request's own thread, before and after the queue pipeline.
+
+Each simulated request emits the records a generation currently produces
+(token verification, the upstream HTTP call, the completion line with its
+fields) into a file, through:
+
+- ``sync-text``: the previous ``logging.basicConfig`` setup, formatting and
+  writing on the calling thread
+- ``queue-json``: ``AsyncQueueHandler`` with the JSON formatter on a writer thread
+- ``queue-json-sampled``: the same with the default ``LOG_SAMPLE_RATES``
+
+    python -m benchmarks.logging_overhead --requests 20000
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import uuid
+from logging.handlers import QueueListener
+from queue import Queue
+from typing import Dict, List
+from benchmarks.dependency_overhead import _configure_fake_credentials
+from benchmarks.load_test import _percentile
+
+SETUPS = ("sync-text", "queue-json", "queue-json-sampled")
+
+# The stock record fields, restored for the sync setup so the run order does not matter
+_STOCK_RECORD_FIELDS = (logging._srcfile, logging.logThreads, logging.logMultiprocessing)
+
+def _log_request() -> None:
+    logging.info("Token verified successfully for user: %s", "bench-user-42")
+    logging.info(
+        'HTTP Request: %s %s "%s %d %s"', "POST",
+        "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3", "HTTP/1.1", 200, "OK"
+    )
+    logging.info(
+        "%s %s %d %.1fms", "POST", "/api/v1/generate/mistral", 200, 412.7,
+        extra={"method": "POST", "route": "/api/v1/generate/{model}", "status": 200, "duration_ms": 412.7}
+    )
+
+def _run_setup(setup: str, requests: int, path: str) -> Dict[str, float]:
+    from app.core.config import Settings
+    from app.core.logging_config import AsyncQueueHandler, JsonFormatter, request_id_var, _skip_unused_record_fields
+
+    writer = logging.FileHandler(path)
+    listener = None
+    if setup == "sync-text":
+        logging._srcfile, logging.logThreads, logging.logMultiprocessing = _STOCK_RECORD_FIELDS
+        writer.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        handler: logging.Handler = writer
+    else:
+        _skip_unused_record_fields()
+        writer.setFormatter(JsonFormatter())
+        sample_rates = Settings().LOG_SAMPLE_RATES if setup == "queue-json-sampled" else {}
+        handler = AsyncQueueHandler(Queue(maxsize=requests * 4), sample_rates)
+        listener = QueueListener(handler.queue, writer)
+        listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+    costs: List[float] = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        token = request_id_var.set(uuid.uuid4().hex)
+        t0 = time.perf_counter()
+        _log_request()
+        costs.append(time.perf_counter() - t0)
+        request_id_var.reset(token)
+    elapsed = time.perf_counter() - started
+    if listener is not None:
+        listener.stop()
+    drained = time.perf_counter() - started
+    writer.close()
+
+    ordered = sorted(costs)
+    return {
+        "mean_us": round(sum(ordered) / len(ordered) * 1e6, 1),
+        "p50_us": round(_percentile(ordered, 50) * 1e6, 1),
+        "p99_us": round(_percentile(ordered, 99) * 1e6, 1),
+        "caller_s": round(elapsed, 2),
+        "drained_s": round(drained, 2)
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--setups", type=lambda s: s.split(","), default=list(SETUPS))
+    args = parser.parse_args()
+
+    _configure_fake_credentials()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for setup in args.setups:
+            results[setup] = _run_setup(setup, args.requests, f"{directory}/{setup}.log")
+
+    print(f"\n{'setup':<22}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'caller s':>10}{'drained s':>11}")
+    for setup, row in results.items():
+        print(
+            f"{setup:<22}{row['mean_us']:>10}{row['p50_us']:>10}{row['p99_us']:>10}"
+            f"{row['caller_s']:>10}{row['drained_s']:>11}"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Latency/throughput trade-off of micro-batching at different wait windows.
+
+Runs ``benchmarks.mock_upstream`` as a capacity-limited replica (a fixed number
+of concurrent generations, each extra list input adding a little latency) and
+sends single generations through the service container at a fixed concurrency,
+once without micro-batching and once per ``--waits`` window.
+
+    python -m benchmarks.micro_batching --waits 0,1,2,5,10,20 --concurrency 32
+"""
+import argparse
+import asyncio
+import copy
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+import httpx
+from benchmarks.dependency_overhead import _configure_fake_credentials
+from benchmarks.load_test import _percentile, _wait_until_ready
+
+async def _run_window(wait_ms: float, args: argparse.Namespace, upstream_url: str) -> Dict[str, Any]:
+    from app.core.config import Settings, DEFAULT_MODEL_REGISTRY
+    from app.core.container import ServiceContainer
+    from app.domain.entities.text_generation import TextGenerationRequest
+
+    registry = copy.deepcopy(DEFAULT_MODEL_REGISTRY)
+    registry["mistral"]["fallbacks"] = []
+    settings = Settings(
+        HUGGINGFACE_API_BASE_URL=f"{upstream_url}/models",
+        MODEL_REGISTRY=registry,
+        GENERATION_CACHE_BACKEND="none",
+        MICRO_BATCH_ENABLED=wait_ms > 0,
+        MICRO_BATCH_MAX_SIZE=args.max_batch_size,
+        MICRO_BATCH_MAX_WAIT=wait_ms / 1000.0
+    )
+    container = ServiceContainer(settings)
+    usecase = container.text_generation_usecase("mistral")
+
+    async with httpx.AsyncClient() as client:
+        calls_before = (await client.get(f"{upstream_url}/stats")).json()["calls"]
+
+    latencies: List[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        n = 0
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                await usecase.execute(TextGenerationRequest(inputs=f"Request {worker_id}-{n}: explain batching."))
+                latencies.append(time.perf_counter() - started)
+            except ValueError:
+                errors += 1
+            n += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    finally:
+        await container.shutdown()
+    elapsed = time.perf_counter() - started
+
+    async with httpx.AsyncClient() as client:
+        upstream_calls = (await client.get(f"{upstream_url}/stats")).json()["calls"] - calls_before
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1),
+        "upstream_calls": upstream_calls,
+        "items_per_call": round(len(ordered) / upstream_calls, 2) if upstream_calls else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 1)
+    }
+
+async def _run(args: argparse.Namespace) -> Dict[float, Dict[str, Any]]:
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    mock = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.mock_upstream", "--port", str(args.upstream_port),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", "0.1",
+            "--batch-item-ms", str(args.batch_item_ms), "--max-concurrency", str(args.upstream_concurrency)
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        await _wait_until_ready(f"{upstream_url}/stats")
+        return {wait: await _run_window(wait, args, upstream_url) for wait in args.waits}
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waits", type=lambda s: [float(w) for w in s.split(",")], default=[0, 1, 2, 5, 10, 20],
+                        help="comma separated wait windows in ms; 0 runs without micro-batching")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="mock latency of a single generation")
+    parser.add_argument("--batch-item-ms", type=float, default=5.0, help="mock latency per extra batched input")
+    parser.add_argument("--upstream-concurrency", type=int, default=4, help="generations the mock serves at once")
+    parser.add_argument("--upstream-port", type=int, default=8092)
+    args = parser.parse_args()
+
+    _configure_fake_credentials()
+    results = asyncio.run(_run(args))
+
+    print(
+        f"\n{'wait ms':>8}{'requests':>10}{'rps':>8}{'upstream':>10}{'per call':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    )
+    for wait, row in results.items():
+        label = f"{wait:g}" if wait > 0 else "off"
+        print(
+            f"{label:>8}{row['requests']:>10}{row['rps']:>8}{row['upstream_calls']:>10}{row['items_per_call']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Local stand-in for the Hugging Face Inference API and Google's token certificates.
+
+Serves ``POST /models/{model_id}`` in the same response shapes the real API uses:
+a JSON list of ``generated_text`` objects, or server-sent events when the payload
+has ``"stream": true``. Latency is drawn from a log-normal distribution, and a
+configurable fraction of calls answer 503 "model is currently loading" with an
+``estimated_time``. A cold start can also be simulated for models whose id
+contains a given substring, from the command line or by posting
+``{"model": ..., "seconds": ...}`` to ``/control/cold-start``. A list of inputs is
+answered with one result list per input, taking ``--batch-item-ms`` longer per
+extra input, and ``--max-concurrency`` caps how many generations run at once
+like a single inference replica would. ``GET /certs`` returns an empty
+certificate set so the token verifier starts without reaching Google.
+
+    python -m benchmarks.mock_upstream --port 8090 --latency-ms 200 --loading-rate 0.01
+    python -m benchmarks.mock_upstream --cold-start Mistral-7B=20
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+class MockInferenceServer:
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_sigma: float = 0.5,
+        loading_rate: float = 0.0,
+        estimated_time: float = 1.0,
+        token_delay_ms: float = 10.0,
+        tokens: int = 32,
+        seed: int = 0,
+        batch_item_ms: float = 0.0,
+        max_concurrency: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.loading_rate = loading_rate
+        self.estimated_time = estimated_time
+        self.token_delay_ms = token_delay_ms
+        self.tokens = tokens
+        self.random = random.Random(seed)
+        self.batch_item_ms = batch_item_ms
+        self.max_concurrency = max_concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.calls = 0
+        self.inputs = 0
+        # Model id substring -> monotonic time its cold start ends
+        self.cold_until: Dict[str, float] = {}
+
+    def start_cold(self, model: str, seconds: float) -> None:
+        self.cold_until[model] = time.monotonic() + seconds
+
+    def loading_time(self, model_id: str) -> Optional[float]:
+        """Seconds until ``model_id`` is loaded, or None if it is warm."""
+        now = time.monotonic()
+        for pattern, until in self.cold_until.items():
+            if pattern in model_id and until > now:
+                return until - now
+        if self.random.random() < self.loading_rate:
+            return self.estimated_time
+        return None
+
+    def latency(self) -> float:
+        """Log-normal latency in seconds whose median is ``latency_ms``."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.random.lognormvariate(math.log(self.latency_ms / 1000.0), self.latency_sigma)
+
+    def completion(self, prompt: str) -> str:
+        words = prompt.split()[-8:] or ["ok"]
+        return " ".join(words[i % len(words)] for i in range(self.tokens))
+
+    async def generate(self, request: Request) -> Response:
+        payload: Dict[str, Any] = await request.json()
+        self.calls += 1
+
+        loading = self.loading_time(request.path_params["model_id"])
+        if loading is not None:
+            return JSONResponse(
+                {"error": "Model is currently loading", "estimated_time": loading},
+                status_code=503
+            )
+
+        inputs = payload.get("inputs", "")
+        prompts: List[str] = inputs if isinstance(inputs, list) else [inputs]
+        self.inputs += len(prompts)
+
+        if payload.get("stream"):
+            return StreamingResponse(self._stream(prompts[0]), media_type="text/event-stream")
+
+        duration = self.latency() + self.batch_item_ms * (len(prompts) - 1) / 1000.0
+        if self.max_concurrency > 0:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.max_concurrency)
+            async with self._slots:
+                await asyncio.sleep(duration)
+        else:
+            await asyncio.sleep(duration)
+        results = [{"generated_text": self.completion(prompt)} for prompt in prompts]
+        if isinstance(inputs, list):
+            return JSONResponse([[result] for result in results])
+        return JSONResponse(results)
+
+    async def _stream(self, prompt: str):
+        await asyncio.sleep(self.latency())
+        words = self.completion(prompt).split()
+        for index, word in enumerate(words):
+            last = index == len(words) - 1
+            event = {
+                "token": {"id": index, "text": word if index == 0 else " " + word, "special": False},
+                "generated_text": " ".join(words) if last else None
+            }
+            yield f"data: {json.dumps(event)}\n\n"
+            if self.token_delay_ms > 0 and not last:
+                await asyncio.sleep(self.token_delay_ms / 1000.0)
+
+    async def certs(self, request: Request) -> Response:
+        return JSONResponse({}, headers={"Cache-Control": "public, max-age=3600"})
+
+    async def cold_start(self, request: Request) -> Response:
+        body = await request.json()
+        self.start_cold(body["model"], float(body["seconds"]))
+        return JSONResponse({"cold": list(self.cold_until)})
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({"calls": self.calls, "inputs": self.inputs})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/models/{model_id:path}", self.generate, methods=["POST"]),
+            Route("/certs", self.certs, methods=["GET"]),
+            Route("/control/cold-start", self.cold_start, methods=["POST"]),
+            Route("/stats", self.stats, methods=["GET"])
+        ])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="median upstream latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal shape; 0 for fixed latency")
+    parser.add_argument("--loading-rate", type=float, default=0.0, help="fraction of calls answered with 503 loading")
+    parser.add_argument("--estimated-time", type=float, default=1.0)
+    parser.add_argument("--token-delay-ms", type=float, default=10.0, help="delay between streamed tokens")
+    parser.add_argument("--tokens", type=int, default=32, help="words per completion")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-item-ms", type=float, default=0.0, help="extra latency per additional list input")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="generations served at once; 0 = unlimited")
+    parser.add_argument("--cold-start", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="answer 503 loading for model ids containing MODEL for the first SECONDS")
+    args = parser.parse_args()
+
+    server = MockInferenceServer(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        loading_rate=args.loading_rate,
+        estimated_time=args.estimated_time,
+        token_delay_ms=args.token_delay_ms,
+        tokens=args.tokens,
+        seed=args.seed,
+        batch_item_ms=args.batch_item_ms,
+        max_concurrency=args.max_concurrency
+    )
+    for spec in args.cold_start:
+        model, _, seconds = spec.partition("=")
+        server.start_cold(model, float(seconds))
+    uvicorn.run(server.app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+``app.main:app`` wired for load tests.
+
+Points the inference client and certificate refresh at ``benchmarks.mock_upstream``,
+swaps Firebase for ``FakeAuthRepository`` and relaxes per-user limits so the
+numbers reflect the service itself. Every setting can still be overridden from
+the environment.
+
+    uvicorn benchmarks.serve:app --workers 2 --port 8083
+"""
+import os
+from benchmarks.dependency_overhead import _configure_fake_credentials
+
+UPSTREAM_URL = os.environ.get("BENCHMARK_UPSTREAM_URL", "http://127.0.0.1:8090")
+
+_configure_fake_credentials()
+os.environ.setdefault("HUGGINGFACE_API_BASE_URL", f"{UPSTREAM_URL}/models")
+os.environ.setdefault("FIREBASE_ID_TOKEN_CERTS_URL", f"{UPSTREAM_URL}/certs")
+os.environ.setdefault("GENERATION_CACHE_BACKEND", "none")
+os.environ.setdefault("RATE_LIMIT_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("MODEL_MAX_IN_FLIGHT", "256")
+os.environ.setdefault("MODEL_MAX_QUEUE", "1024")
+
+from app.domain.usecases.verify_auth import VerifyTokenUseCase, GetUserUseCase
+from app.main import app
+from app.presentation.api.routes import get_verify_token_usecase, get_user_usecase
+from benchmarks.fake_auth import FakeAuthRepository
+
+auth_repository = FakeAuthRepository(latency=float(os.environ.get("BENCHMARK_AUTH_LATENCY", "0")))
+verify_token_usecase = VerifyTokenUseCase(auth_repository)
+user_usecase = GetUserUseCase(auth_repository)
+
+app.dependency_overrides[get_verify_token_usecase] = lambda: verify_token_usecase
+app.dependency_overrides[get_user_usecase] = lambda: user_usecase